@@ -1,866 +1,221 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import argparse
 import warnings
+from batch import indicator_mean, simulate_batch
+from health import health_metrics
+from indicator_graph import IndicatorGraph
+from profiles import FN_RN_PROFILE
+from schema import apply_schema, write_csv
 warnings.filterwarnings('ignore')
 
+# Libellés et unités des métriques de compute_financial_metrics
+METRIC_LABELS = {
+    'avg_revenue': ('Revenus moyens annuels', 'M€'),
+    'avg_expenses': ('Dépenses moyennes annuelles', 'M€'),
+    'avg_adherents': ('Adhérents moyens', 'personnes'),
+    'avg_execution': ("Taux d'exécution budgétaire moyen", '%'),
+    'revenue_growth': ('Évolution des revenus', '%'),
+    'adherents_growth': ('Évolution des adhérents', '%'),
+    'small_donations_share': ('Part des petits dons dans les revenus', '%'),
+    'legal_share': ('Part des dépenses juridiques', '%'),
+    'debt_share': ('Endettement moyen vs revenus', '%'),
+    'avg_balance': ('Solde financier moyen', '% du budget'),
+    'last_debt': ('Endettement final', 'M€'),
+    'max_score': ('Meilleur score présidentiel', '%'),
+    'debt_service_5y': ('Service de la dette sur 5 ans', '% des revenus'),
+    'deficit_years_5y': ('Années de déficit sur 5 ans', 'années'),
+    'debt_to_revenue': ('Dette / revenus (dernière année)', '%'),
+    'public_dependency_trend': ('Part du financement public, moyenne 5 ans', '%'),
+}
+
+# Style appliqué une seule fois à l'import : construire une figure ne modifie
+# plus l'état global de matplotlib et peut se faire depuis plusieurs threads
+plt.style.use('seaborn-v0_8')
+
+
+def simulate_scenario(profile, seed=None):
+    """Simulation pure d'un scénario : {'Annee': ..., colonne: tableau} en ordre du profil
+
+    ``seed`` est une graine ou un ``np.random.RandomState`` ; les tirages en
+    viennent, de sorte qu'à graine égale le résultat est celui de
+    ``np.random.seed(seed); generate_financial_data()``. Sans ``seed``, le
+    générateur global de NumPy est utilisé. Avec une graine, aucun état
+    partagé n'est modifié : l'appel est réentrant et utilisable depuis
+    plusieurs threads.
+    """
+    if isinstance(seed, np.random.RandomState):
+        rng = seed
+    else:
+        rng = np.random if seed is None else np.random.RandomState(seed)
+    years = np.arange(profile.start_year, profile.end_year + 1)
+    data = {'Annee': years}
+    
+    # Adhérents, revenus, dépenses, indicateurs et investissements (ordre du profil)
+    for column, spec in profile.indicators.items():
+        values = np.asarray(indicator_mean(profile, column, years), dtype=float)
+        if spec.sigma:
+            values = values * rng.normal(1, spec.sigma, len(years))
+        data[column] = values
+    
+    return _add_party_trends(profile, data)
+
+
+def _add_party_trends(profile, data):
+    """Événements marquants du profil (multiplicateurs et valeurs réelles) sur une copie des tableaux"""
+    data = dict(data)
+    years = data['Annee']
+    touched = {column for _, column, _ in profile.events + profile.overrides}
+    for column in touched:
+        data[column] = data[column].copy()
+    
+    for year, column, factor in profile.events:
+        data[column][years == year] *= factor
+    
+    for year, column, value in profile.overrides:
+        data[column][years == year] = value
+    return data
+
+
+def scenario_frame(profile, seed=None):
+    """DataFrame typé (voir schema) d'un scénario simulé par ``simulate_scenario``"""
+    return apply_schema(pd.DataFrame(simulate_scenario(profile, seed)))
+
+
+def evaluate_scenarios(scenarios, max_workers=None, render=False):
+    """Évalue (et trace si ``render``) des scénarios ``(profil, graine)`` dans un pool de threads
+
+    Renvoie, dans l'ordre des scénarios, des dictionnaires
+    ``{'donnees': DataFrame, 'metriques': dict, 'figure': Figure | None}``.
+    Les calculs NumPy et le rendu Agg libèrent le GIL en grande partie ;
+    sous un Python sans GIL, les scénarios s'exécutent en parallèle.
+    """
+    def evaluate(scenario):
+        profile, seed = scenario
+        analyzer = FN_RN_FinanceAnalyzer(profile)
+        df = scenario_frame(profile, seed)
+        return {'donnees': df,
+                'metriques': analyzer.compute_financial_metrics(df),
+                'figure': analyzer._build_figure(df) if render else None}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(evaluate, scenarios))
+
+
+GRAPH_CACHE_SIZE = 4  # graphes d'indicateurs conservés par analyseur
+
+
 class FN_RN_FinanceAnalyzer:
-    def __init__(self):
-        self.parti = "Front National / Rassemblement National"
+    def __init__(self, profile=None):
+        # Profil du parti (configuration, régimes, calendriers, événements)
+        self.profile = profile if profile is not None else FN_RN_PROFILE
+        self.parti = self.profile.parti
         self.colors = ['#000080', '#FF0000', '#8B0000', '#000000', '#FFFFFF', 
                       '#C0C0C0', '#800000', '#003366', '#660000', '#333333']
         
-        self.start_year = 1972  # Création du FN
-        self.end_year = 2025
-        self.creation_year = 1972
-        self.renommage_year = 2018  # Devenu Rassemblement National
+        self.start_year = self.profile.start_year
+        self.end_year = self.profile.end_year
+        self.creation_year = self.profile.creation_year
+        self.renommage_year = self.profile.renommage_year
+        self.config = self.profile.config
+        self._graphs = OrderedDict()  # graphes d'indicateurs mémoïsés par graine (LRU)
         
-        # Configuration spécifique au FN/RN
-        self.config = {
-            "type": "parti_politique",
-            "orientation": "extreme_droite",
-            "electorat_cible": ["ouvriers", "classes_populaires", "ruraux", "patriotes"],
-            "budget_base": 8,  # millions d'euros (plus faible que l'UMP initialement)
-            "adherents_base": 50000,
-            "importance": "croissant",
-            "sources_financement": ["cotisations", "dons_petits", "financement_public", "emprunts", "evenements"],
-            "specificites": ["financement_controle", "difficultes_bancaires", "soutien_petits_dons"]
-        }
+    def generate_financial_data(self, seed=None):
+        """Génère des données financières pour le parti
         
-    def generate_financial_data(self):
-        """Génère des données financières pour le FN/RN"""
+        Sans ``seed``, utilise le générateur global de NumPy (``np.random.seed``) ;
+        avec ``seed``, un générateur local (voir simulate_scenario).
+        """
         print(f"🏛️ Génération des données financières pour {self.parti}...")
         
-        # Créer une base de données annuelle
-        dates = pd.date_range(start=f'{self.start_year}-01-01', 
-                             end=f'{self.end_year}-12-31', freq='Y')
-        
-        data = {'Annee': [date.year for date in dates]}
-        
-        # Données d'adhérents et structure
-        data['Adherents'] = self._simulate_adherents(dates)
-        data['Federations_Departementales'] = self._simulate_federations(dates)
-        data['Elus_Locaux'] = self._simulate_elus_locaux(dates)
-        data['Elus_Nationaux'] = self._simulate_elus_nationaux(dates)
-        data['Score_Presidentielles'] = self._simulate_presidential_scores(dates)
-        
-        # Revenus du parti
-        data['Revenus_Total'] = self._simulate_total_revenue(dates)
-        data['Cotisations_Adherents'] = self._simulate_membership_fees(dates)
-        data['Dons_Petits'] = self._simulate_small_donations(dates)
-        data['Dons_Grands'] = self._simulate_large_donations(dates)
-        data['Financement_Public'] = self._simulate_public_funding(dates)
-        data['Revenus_Evenements'] = self._simulate_event_revenue(dates)
-        data['Emprunts'] = self._simulate_loans(dates)
-        data['Aides_Etrangeres'] = self._simulate_foreign_aid(dates)
-        
-        # Dépenses du parti
-        data['Depenses_Total'] = self._simulate_total_expenses(dates)
-        data['Depenses_Personnel'] = self._simulate_staff_expenses(dates)
-        data['Depenses_Campagnes'] = self._simulate_campaign_expenses(dates)
-        data['Depenses_Communication'] = self._simulate_communication_expenses(dates)
-        data['Depenses_Juridiques'] = self._simulate_legal_expenses(dates)
-        data['Depenses_Fonctionnement'] = self._simulate_operating_expenses(dates)
-        data['Remboursements_Emprunts'] = self._simulate_loan_repayments(dates)
-        
-        # Indicateurs financiers
-        data['Taux_Execution_Budget'] = self._simulate_budget_execution_rate(dates)
-        data['Ratio_Cotisations_Revenus'] = self._simulate_membership_ratio(dates)
-        data['Dependance_Financement_Public'] = self._simulate_public_funding_dependency(dates)
-        data['Solde_Financier'] = self._simulate_financial_balance(dates)
-        data['Endettement'] = self._simulate_debt(dates)
-        data['Ratio_Depenses_Juridiques'] = self._simulate_legal_ratio(dates)
-        
-        # Investissements stratégiques
-        data['Investissement_Communication'] = self._simulate_communication_investment(dates)
-        data['Investissement_Numérique'] = self._simulate_digital_investment(dates)
-        data['Investissement_Formation'] = self._simulate_training_investment(dates)
-        data['Investissement_International'] = self._simulate_international_investment(dates)
-        
-        df = pd.DataFrame(data)
-        
-        # Ajouter des tendances spécifiques au FN/RN
-        self._add_party_trends(df)
-        
-        return df
-    
-    def _simulate_adherents(self, dates):
-        """Simule le nombre d'adhérents"""
-        base_adherents = self.config["adherents_base"]
-        
-        adherents = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Évolution historique des adhérents selon les périodes politiques
-            if 1972 <= year <= 1980:  # Débuts difficiles
-                growth_rate = 0.05
-            elif 1981 <= year <= 1987:  # Percée électorale
-                growth_rate = 0.15
-            elif 1988 <= year <= 1994:  # Consolidation
-                growth_rate = 0.08
-            elif 1995 <= year <= 2001:  # Présidentielle 1995, 2002
-                growth_rate = 0.12
-            elif 2002 <= year <= 2006:  # Après 2002
-                growth_rate = 0.20
-            elif 2007 <= year <= 2010:  # Période intermédiaire
-                growth_rate = 0.06
-            elif 2011 <= year <= 2016:  # Marine Le Pen
-                growth_rate = 0.25
-            elif 2017 <= year <= 2021:  # Après 2017
-                growth_rate = 0.10
-            else:  # 2022-2025
-                growth_rate = 0.08
-                
-            growth = 1 + growth_rate * (i/4)
-            noise = np.random.normal(1, 0.10)
-            adherents.append(base_adherents * growth * noise)
-        
-        return adherents
-    
-    def _simulate_federations(self, dates):
-        """Simule le nombre de fédérations départementales"""
-        base_federations = 20  # Début modeste
-        
-        federations = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1980:
-                growth_rate = 0.08
-            elif year <= 2000:
-                growth_rate = 0.12
-            elif year <= 2010:
-                growth_rate = 0.06
-            else:
-                growth_rate = 0.10
-                
-            growth = 1 + growth_rate * (i/5)
-            federations.append(base_federations * growth)
-        
-        return federations
-    
-    def _simulate_elus_locaux(self, dates):
-        """Simule le nombre d'élus locaux"""
-        base_elus = 100  # Début très modeste
-        
-        elus = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Élections municipales
-            if year in [1977, 1983, 1989, 1995, 2001, 2008, 2014, 2020]:
-                if year <= 1995:
-                    multiplier = 1.3
-                elif year <= 2010:
-                    multiplier = 1.8
-                else:
-                    multiplier = 2.2
-            else:
-                multiplier = 1.0
-                
-            # Tendance générale de croissance
-            if year <= 1990:
-                growth_rate = 0.15
-            elif year <= 2010:
-                growth_rate = 0.20
-            else:
-                growth_rate = 0.25
-                
-            growth = 1 + growth_rate * (i/6)
-            noise = np.random.normal(1, 0.15)
-            elus.append(base_elus * growth * multiplier * noise)
-        
-        return elus
-    
-    def _simulate_elus_nationaux(self, dates):
-        """Simule le nombre d'élus nationaux"""
-        base_elus = 0  # Aucun élu national au début
-        
-        elus = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Élections législatives
-            if year in [1973, 1978, 1981, 1986, 1988, 1993, 1997, 2002, 2007, 2012, 2017, 2022]:
-                if year == 1986:  # Proportionnelle
-                    multiplier = 35
-                elif year == 1988:
-                    multiplier = 1
-                elif year == 1997:
-                    multiplier = 1
-                elif year == 2002:
-                    multiplier = 0
-                elif year == 2007:
-                    multiplier = 0
-                elif year == 2012:
-                    multiplier = 2
-                elif year == 2017:
-                    multiplier = 8
-                elif year == 2022:
-                    multiplier = 89
-                else:
-                    multiplier = 0
-            else:
-                multiplier = 0
-                
-            # Élections européennes
-            if year in [1979, 1984, 1989, 1994, 1999, 2004, 2009, 2014, 2019]:
-                europe_multiplier = 3
-            else:
-                europe_multiplier = 0
-                
-            total_elus = base_elus + multiplier + europe_multiplier
-            elus.append(total_elus)
-        
-        return elus
-    
-    def _simulate_presidential_scores(self, dates):
-        """Simule les scores présidentiels"""
-        scores = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year == 1974:
-                score = 0.5
-            elif year == 1981:
-                score = 0.0  # Pas de candidat
-            elif year == 1988:
-                score = 14.4
-            elif year == 1995:
-                score = 15.0
-            elif year == 2002:
-                score = 16.9
-            elif year == 2007:
-                score = 10.4
-            elif year == 2012:
-                score = 17.9
-            elif year == 2017:
-                score = 21.3
-            elif year == 2022:
-                score = 41.5
-            else:
-                score = 0
-                
-            scores.append(score)
-        
-        return scores
-    
-    def _simulate_total_revenue(self, dates):
-        """Simule les revenus totaux"""
-        base_revenue = self.config["budget_base"]
-        
-        revenue = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Croissance historique des revenus
-            if 1972 <= year <= 1980:  # Débuts difficiles
-                growth_rate = 0.08
-            elif 1981 <= year <= 1987:  # Première percée
-                growth_rate = 0.20
-            elif 1988 <= year <= 1994:  # Consolidation
-                growth_rate = 0.12
-            elif 1995 <= year <= 2001:  # Croissance régulière
-                growth_rate = 0.15
-            elif 2002 <= year <= 2006:  # Après 2002
-                growth_rate = 0.25
-            elif 2007 <= year <= 2010:  # Période intermédiaire
-                growth_rate = 0.10
-            elif 2011 <= year <= 2016:  # Marine Le Pen
-                growth_rate = 0.30
-            elif 2017 <= year <= 2021:  # Après 2017
-                growth_rate = 0.18
-            else:  # 2022-2025
-                growth_rate = 0.22
-                
-            growth = 1 + growth_rate * (i/4)
-            noise = np.random.normal(1, 0.12)
-            revenue.append(base_revenue * growth * noise)
-        
-        return revenue
-    
-    def _simulate_membership_fees(self, dates):
-        """Simule les cotisations des adhérents"""
-        base_fees = self.config["budget_base"] * 0.20
-        
-        fees = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1990:
-                growth_rate = 0.10
-            elif year <= 2010:
-                growth_rate = 0.15
-            else:
-                growth_rate = 0.20
-                
-            growth = 1 + growth_rate * (i/5)
-            noise = np.random.normal(1, 0.10)
-            fees.append(base_fees * growth * noise)
-        
-        return fees
-    
-    def _simulate_small_donations(self, dates):
-        """Simule les petits dons (spécificité FN/RN)"""
-        base_donations = self.config["budget_base"] * 0.35
-        
-        donations = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Importance croissante des petits dons
-            if year <= 1990:
-                multiplier = 0.8
-            elif year <= 2010:
-                multiplier = 1.2
-            else:
-                multiplier = 1.5
-                
-            # Cycles électoraux
-            if year in [1974, 1988, 1995, 2002, 2007, 2012, 2017, 2022]:
-                electoral_multiplier = 2.0
-            else:
-                electoral_multiplier = 1.0
-                
-            growth = 1 + 0.08 * (i/3)
-            noise = np.random.normal(1, 0.18)
-            donations.append(base_donations * growth * multiplier * electoral_multiplier * noise)
-        
-        return donations
-    
-    def _simulate_large_donations(self, dates):
-        """Simule les grands dons (plus rares pour le FN/RN)"""
-        base_donations = self.config["budget_base"] * 0.05
-        
-        donations = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Difficultés à obtenir des grands dons
-            if year <= 2000:
-                multiplier = 0.3
-            elif year <= 2010:
-                multiplier = 0.5
-            else:
-                multiplier = 0.7
-                
-            growth = 1 + 0.03 * (i/4)
-            noise = np.random.normal(1, 0.25)
-            donations.append(base_donations * growth * multiplier * noise)
-        
-        return donations
-    
-    def _simulate_public_funding(self, dates):
-        """Simule le financement public"""
-        base_funding = self.config["budget_base"] * 0.25
-        
-        funding = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Dépend des résultats électoraux (très variable)
-            if year <= 1985:
-                multiplier = 0.1  # Très faible
-            elif year <= 2000:
-                multiplier = 0.4
-            elif year <= 2010:
-                multiplier = 0.6
-            elif year <= 2020:
-                multiplier = 0.8
-            else:
-                multiplier = 1.2  # Augmentation avec les députés
-                
-            growth = 1 + 0.05 * (i/4)
-            noise = np.random.normal(1, 0.15)
-            funding.append(base_funding * growth * multiplier * noise)
-        
-        return funding
-    
-    def _simulate_event_revenue(self, dates):
-        """Simule les revenus des événements"""
-        base_revenue = self.config["budget_base"] * 0.08
-        
-        revenue = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 1990:
-                growth = 1 + 0.06 * max(0, (year - 1990)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.14)
-            revenue.append(base_revenue * growth * noise)
-        
-        return revenue
-    
-    def _simulate_loans(self, dates):
-        """Simule les emprunts (difficultés bancaires spécifiques)"""
-        base_loans = self.config["budget_base"] * 0.15  # Plus élevé à cause des difficultés
-        
-        loans = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            # Difficultés d'accès au crédit
-            if year in [1972, 1984, 1990, 1998, 2005, 2011, 2014, 2020]:
-                multiplier = 3.0  # Besoins importants
-            else:
-                multiplier = 1.0
-                
-            growth = 1 + 0.04 * (i/4)
-            noise = np.random.normal(1, 0.30)  # Forte variabilité
-            loans.append(base_loans * growth * multiplier * noise)
-        
-        return loans
-    
-    def _simulate_foreign_aid(self, dates):
-        """Simule les aides étrangères (controverses)"""
-        base_aid = self.config["budget_base"] * 0.02
-        
-        aid = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [2014, 2015, 2016, 2017]:
-                multiplier = 2.5  # Période des prêts russes
-            else:
-                multiplier = 0.5
-                
-            growth = 1 + 0.01 * (i/4)
-            noise = np.random.normal(1, 0.40)  # Très variable
-            aid.append(base_aid * growth * multiplier * noise)
-        
-        return aid
-    
-    def _simulate_total_expenses(self, dates):
-        """Simule les dépenses totales"""
-        base_expenses = self.config["budget_base"] * 0.90
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [1974, 1988, 1995, 2002, 2007, 2012, 2017, 2022]:
-                multiplier = 1.6  # Années électorales
-            else:
-                multiplier = 1.0
-                
-            growth = 1 + 0.06 * (i/3)
-            noise = np.random.normal(1, 0.12)
-            expenses.append(base_expenses * growth * multiplier * noise)
-        
-        return expenses
-    
-    def _simulate_staff_expenses(self, dates):
-        """Simule les dépenses de personnel"""
-        base_staff = self.config["budget_base"] * 0.25
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 2000:
-                growth_rate = 0.08
-            else:
-                growth_rate = 0.12
-                
-            growth = 1 + growth_rate * (i/4)
-            noise = np.random.normal(1, 0.08)
-            expenses.append(base_staff * growth * noise)
-        
-        return expenses
-    
-    def _simulate_campaign_expenses(self, dates):
-        """Simule les dépenses de campagne"""
-        base_campaign = self.config["budget_base"] * 0.30
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [1974, 1988, 1995, 2002, 2007, 2012, 2017, 2022]:
-                multiplier = 4.0  # Campagnes présidentielles
-            elif year in [1973, 1978, 1981, 1986, 1988, 1993, 1997, 2002, 2007, 2012, 2017, 2022]:
-                multiplier = 2.5  # Législatives
-            else:
-                multiplier = 0.8
-                
-            growth = 1 + 0.07 * (i/3)
-            noise = np.random.normal(1, 0.28)
-            expenses.append(base_campaign * growth * multiplier * noise)
-        
-        return expenses
-    
-    def _simulate_communication_expenses(self, dates):
-        """Simule les dépenses de communication"""
-        base_communication = self.config["budget_base"] * 0.15
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2000:
-                growth = 1 + 0.10 * max(0, (year - 2000)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.15)
-            expenses.append(base_communication * growth * noise)
-        
-        return expenses
-    
-    def _simulate_legal_expenses(self, dates):
-        """Simule les dépenses juridiques (spécificité FN/RN)"""
-        base_legal = self.config["budget_base"] * 0.08  # Élevé à cause des nombreux procès
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [1990, 1998, 2004, 2011, 2015, 2018]:
-                multiplier = 2.5  # Périodes de procès importants
-            else:
-                multiplier = 1.2
-                
-            growth = 1 + 0.05 * (i/4)
-            noise = np.random.normal(1, 0.22)
-            expenses.append(base_legal * growth * multiplier * noise)
-        
-        return expenses
-    
-    def _simulate_operating_expenses(self, dates):
-        """Simule les dépenses de fonctionnement"""
-        base_operating = self.config["budget_base"] * 0.10
-        
-        expenses = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            growth = 1 + 0.04 * (i/4)
-            noise = np.random.normal(1, 0.07)
-            expenses.append(base_operating * growth * noise)
-        
-        return expenses
-    
-    def _simulate_loan_repayments(self, dates):
-        """Simule les remboursements d'emprunts"""
-        base_repayment = self.config["budget_base"] * 0.12  # Élevé à cause des difficultés
-        
-        repayments = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2000:
-                growth = 1 + 0.09 * max(0, (year - 2000)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.18)
-            repayments.append(base_repayment * growth * noise)
-        
-        return repayments
-    
-    def _simulate_budget_execution_rate(self, dates):
-        """Simule le taux d'exécution du budget"""
-        rates = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1990:
-                base_rate = 0.78  # Gestion moins professionnelle
-            elif year <= 2010:
-                base_rate = 0.82
-            else:
-                base_rate = 0.86  # Amélioration
-                
-            noise = np.random.normal(1, 0.06)
-            rates.append(base_rate * noise)
-        
-        return rates
-    
-    def _simulate_membership_ratio(self, dates):
-        """Simule le ratio cotisations/revenus"""
-        ratios = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1990:
-                base_ratio = 0.25
-            elif year <= 2010:
-                base_ratio = 0.22
-            else:
-                base_ratio = 0.28  # Augmentation avec la base militante
-                
-            noise = np.random.normal(1, 0.06)
-            ratios.append(base_ratio * noise)
-        
-        return ratios
-    
-    def _simulate_public_funding_dependency(self, dates):
-        """Simule la dépendance au financement public"""
-        dependencies = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1990:
-                base_dependency = 0.15  # Faible (peu d'élus)
-            elif year <= 2010:
-                base_dependency = 0.25
-            elif year <= 2020:
-                base_dependency = 0.35
-            else:
-                base_dependency = 0.45  # Augmentation avec les députés
-                
-            noise = np.random.normal(1, 0.08)
-            dependencies.append(base_dependency * noise)
-        
-        return dependencies
-    
-    def _simulate_financial_balance(self, dates):
-        """Simule le solde financier"""
-        balances = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [1974, 1988, 1995, 2002, 2007, 2012, 2017, 2022]:
-                base_balance = -0.25  # Déficits électoraux importants
-            elif year in [1975, 1989, 1996, 2003, 2008, 2013, 2018, 2023]:
-                base_balance = 0.05  # Redressement
-            else:
-                base_balance = -0.08  # Difficultés chroniques
-                
-            noise = np.random.normal(1, 0.15)
-            balances.append(base_balance * noise)
-        
-        return balances
-    
-    def _simulate_debt(self, dates):
-        """Simule l'endettement"""
-        base_debt = self.config["budget_base"] * 0.3
-        
-        debt = []
-        current_debt = base_debt
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year in [1974, 1984, 1990, 1998, 2005, 2011, 2014, 2020]:
-                change_rate = 0.35  # Forte augmentation
-            elif year in [1980, 1992, 2000, 2008, 2016, 2022]:
-                change_rate = -0.12  # Réduction
-            else:
-                change_rate = 0.08  # Augmentation régulière
-                
-            current_debt *= (1 + change_rate)
-            noise = np.random.normal(1, 0.12)
-            debt.append(current_debt * noise)
-        
-        return debt
-    
-    def _simulate_legal_ratio(self, dates):
-        """Simule le ratio des dépenses juridiques"""
-        ratios = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year <= 1990:
-                base_ratio = 0.06
-            elif year <= 2010:
-                base_ratio = 0.09
-            else:
-                base_ratio = 0.07  # Légère baisse
-                
-            noise = np.random.normal(1, 0.10)
-            ratios.append(base_ratio * noise)
-        
-        return ratios
-    
-    def _simulate_communication_investment(self, dates):
-        """Simule l'investissement en communication"""
-        base_investment = self.config["budget_base"] * 0.06
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2000:
-                growth = 1 + 0.11 * max(0, (year - 2000)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.16)
-            investment.append(base_investment * growth * noise)
-        
-        return investment
-    
-    def _simulate_digital_investment(self, dates):
-        """Simule l'investissement numérique"""
-        base_investment = self.config["budget_base"] * 0.04
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2010:
-                growth = 1 + 0.15 * max(0, (year - 2010)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.20)
-            investment.append(base_investment * growth * noise)
-        
-        return investment
-    
-    def _simulate_training_investment(self, dates):
-        """Simule l'investissement en formation"""
-        base_investment = self.config["budget_base"] * 0.03
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2005:
-                growth = 1 + 0.08 * max(0, (year - 2005)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.14)
-            investment.append(base_investment * growth * noise)
-        
-        return investment
-    
-    def _simulate_international_investment(self, dates):
-        """Simule l'investissement international"""
-        base_investment = self.config["budget_base"] * 0.02
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            
-            if year >= 2010:
-                growth = 1 + 0.06 * max(0, (year - 2010)/10)
-            else:
-                growth = 1
-                
-            noise = np.random.normal(1, 0.22)
-            investment.append(base_investment * growth * noise)
-        
-        return investment
-    
-    def _add_party_trends(self, df):
-        """Ajoute des tendances réalistes pour le FN/RN"""
-        for i, row in df.iterrows():
-            year = row['Annee']
-            
-            # Création du FN (1972)
-            if year == 1972:
-                df.loc[i, 'Revenus_Total'] *= 0.5  # Débuts très modestes
-                df.loc[i, 'Adherents'] *= 0.8
-            
-            # Première présidentielle (1974)
-            if year == 1974:
-                df.loc[i, 'Depenses_Campagnes'] *= 3.0
-                df.loc[i, 'Dons_Petits'] *= 2.5
-            
-            # Percée des européennes (1984)
-            if year == 1984:
-                df.loc[i, 'Financement_Public'] *= 2.0
-                df.loc[i, 'Revenus_Total'] *= 1.4
-            
-            # Présidentielle 1988
-            if year == 1988:
-                df.loc[i, 'Depenses_Campagnes'] *= 2.8
-                df.loc[i, 'Adherents'] *= 1.3
-            
-            # Affaire des fiches (1990)
-            if year == 1990:
-                df.loc[i, 'Depenses_Juridiques'] *= 2.2
-            
-            # Présidentielle 2002 (second tour)
-            if year == 2002:
-                df.loc[i, 'Revenus_Total'] *= 1.8
-                df.loc[i, 'Dons_Petits'] *= 3.0
-                df.loc[i, 'Adherents'] *= 1.6
-            
-            # Succession Marine Le Pen (2011)
-            if year == 2011:
-                df.loc[i, 'Investissement_Communication'] *= 1.5
-                df.loc[i, 'Adherents'] *= 1.4
-            
-            # Prêts russes (2014)
-            if year == 2014:
-                df.loc[i, 'Emprunts'] *= 4.0
-                df.loc[i, 'Aides_Etrangeres'] *= 3.5
-            
-            # Présidentielle 2017 (second tour)
-            if year == 2017:
-                df.loc[i, 'Depenses_Campagnes'] *= 3.2
-                df.loc[i, 'Financement_Public'] *= 1.6
-            
-            # Changement de nom RN (2018)
-            if year == 2018:
-                df.loc[i, 'Investissement_Communication'] *= 1.8
-                df.loc[i, 'Depenses_Communication'] *= 1.6
-            
-            # COVID-19 (2020)
-            if year == 2020:
-                df.loc[i, 'Revenus_Evenements'] *= 0.4
-                df.loc[i, 'Investissement_Numérique'] *= 1.8
-            
-            # Élections 2022 (89 députés)
-            if year == 2022:
-                df.loc[i, 'Financement_Public'] *= 2.5
-                df.loc[i, 'Revenus_Total'] *= 1.6
-                df.loc[i, 'Elus_Nationaux'] = 89  # Réel chiffre 2022
+        # Types compacts (entiers pour les effectifs, float32 pour les montants)
+        return scenario_frame(self.profile, seed)
+    
+    def compute(self, columns, seed=None):
+        """Simule uniquement les colonnes demandées (et leurs dépendances)
+        
+        Chaque indicateur a son propre flux aléatoire : pour une graine donnée,
+        une colonne a la même valeur quel que soit l'ensemble demandé.
+        """
+        # Seuls les graphes à graine fixée sont mémoïsés (les GRAPH_CACHE_SIZE plus récents)
+        graph = self._graphs.get(seed) if seed is not None else None
+        if graph is not None:
+            self._graphs.move_to_end(seed)
+        else:
+            graph = IndicatorGraph(self.profile, seed=seed)
+            if seed is not None:
+                self._graphs[seed] = graph
+                while len(self._graphs) > GRAPH_CACHE_SIZE:
+                    self._graphs.popitem(last=False)
+        
+        values = graph.compute(columns)
+        data = {'Annee': graph.years}
+        for column in columns:
+            if column != 'Annee':
+                data[column] = values[column][0]
+        return apply_schema(pd.DataFrame(data))
     
     def create_financial_analysis(self, df):
         """Crée une analyse complète des finances du FN/RN"""
-        plt.style.use('seaborn-v0_8')
-        fig = plt.figure(figsize=(20, 24))
+        # Affichage interactif : seule cette figure est gérée par pyplot
+        fig = self._build_figure(df, plt.figure(figsize=(20, 24)))
+        fig.savefig('FN_RN_financial_analysis.png', dpi=300, bbox_inches='tight')
+        plt.show()
+        
+        # Générer les insights
+        self._generate_financial_insights(df)
+    
+    def _build_figure(self, df, fig=None):
+        """Construit la figure des 8 panneaux d'analyse
+
+        Sans ``fig``, une ``Figure`` indépendante de pyplot est créée (API
+        objet, utilisable depuis plusieurs threads).
+        """
+        if fig is None:
+            fig = Figure(figsize=(20, 24))
         
         # 1. Évolution des revenus et dépenses
-        ax1 = plt.subplot(4, 2, 1)
+        ax1 = fig.add_subplot(4, 2, 1)
         self._plot_revenue_expenses(df, ax1)
         
         # 2. Structure des revenus
-        ax2 = plt.subplot(4, 2, 2)
+        ax2 = fig.add_subplot(4, 2, 2)
         self._plot_revenue_structure(df, ax2)
         
         # 3. Structure des dépenses
-        ax3 = plt.subplot(4, 2, 3)
+        ax3 = fig.add_subplot(4, 2, 3)
         self._plot_expenses_structure(df, ax3)
         
         # 4. Adhérents et scores électoraux
-        ax4 = plt.subplot(4, 2, 4)
+        ax4 = fig.add_subplot(4, 2, 4)
         self._plot_membership_electoral(df, ax4)
         
         # 5. Investissements stratégiques
-        ax5 = plt.subplot(4, 2, 5)
+        ax5 = fig.add_subplot(4, 2, 5)
         self._plot_strategic_investments(df, ax5)
         
         # 6. Indicateurs financiers spécifiques
-        ax6 = plt.subplot(4, 2, 6)
+        ax6 = fig.add_subplot(4, 2, 6)
         self._plot_specific_indicators(df, ax6)
         
         # 7. Évolution des élus
-        ax7 = plt.subplot(4, 2, 7)
+        ax7 = fig.add_subplot(4, 2, 7)
         self._plot_elected_officials(df, ax7)
         
         # 8. Situation financière et endettement
-        ax8 = plt.subplot(4, 2, 8)
+        ax8 = fig.add_subplot(4, 2, 8)
         self._plot_financial_situation(df, ax8)
         
-        plt.suptitle(f'Analyse des Finances du {self.parti} ({self.start_year}-{self.end_year})', 
+        fig.suptitle(f'Analyse des Finances du {self.parti} ({self.start_year}-{self.end_year})', 
                     fontsize=16, fontweight='bold')
-        plt.tight_layout()
-        plt.savefig(f'FN_RN_financial_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        # Générer les insights
-        self._generate_financial_insights(df)
+        fig.tight_layout()
+        return fig
     
     def _plot_revenue_expenses(self, df, ax):
         """Plot de l'évolution des revenus et dépenses"""
@@ -876,12 +231,7 @@ class FN_RN_FinanceAnalyzer:
         ax.grid(True, alpha=0.3)
         
         # Ajouter des annotations pour les événements clés
-        key_events = {
-            1972: 'Création FN', 1974: '1ère présidentielle', 
-            1984: 'Percée européenne', 2002: 'Second tour', 
-            2011: 'Marine Le Pen', 2014: 'Prêts russes',
-            2017: 'Second tour', 2018: 'RN', 2022: '89 députés'
-        }
+        key_events = {year: label for year, label, _ in self.profile.milestones}
         
         for year, event in key_events.items():
             if year in df['Annee'].values:
@@ -1021,6 +371,13 @@ class FN_RN_FinanceAnalyzer:
         ax.bar(df['Annee'], df['Solde_Financier']*100, label='Solde Financier (% du budget)', 
               color=df['Solde_Financier'].apply(lambda x: '#000080' if x > 0 else '#FF0000'), alpha=0.7)
         
+        # Tendances glissantes (voir health)
+        health = health_metrics({column: df[column].to_numpy(dtype=float) for column in df.columns})
+        ax.plot(df['Annee'], health['Solde_Financier_Moy_5ans']*100, label='Solde moyen glissant 5 ans (%)',
+               linewidth=2, color='#000080', linestyle='--')
+        ax.plot(df['Annee'], health['Service_Dette_3ans']*100, label='Service de la dette sur 3 ans (% des revenus)',
+               linewidth=2, color='#FF8C00')
+        
         ax.set_title('Situation Financière et Endettement', fontsize=12, fontweight='bold')
         ax.set_ylabel('Solde Financier (% du budget)', color='#000080')
         ax.tick_params(axis='y', labelcolor='#000080')
@@ -1038,52 +395,68 @@ class FN_RN_FinanceAnalyzer:
         lines2, labels2 = ax2.get_legend_handles_labels()
         ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
     
+    def compute_financial_metrics(self, df):
+        """Calcule les métriques analytiques (voir METRIC_LABELS pour les libellés et unités)"""
+        health = health_metrics({column: df[column].to_numpy(dtype=float) for column in df.columns})
+        return {
+            # Statistiques de base
+            'avg_revenue': df['Revenus_Total'].mean(),
+            'avg_expenses': df['Depenses_Total'].mean(),
+            'avg_adherents': df['Adherents'].mean(),
+            'avg_execution': df['Taux_Execution_Budget'].mean() * 100,
+            # Croissance historique
+            'revenue_growth': ((df['Revenus_Total'].iloc[-1] / 
+                               df['Revenus_Total'].iloc[0]) - 1) * 100,
+            'adherents_growth': ((df['Adherents'].iloc[-1] / 
+                                 df['Adherents'].iloc[0]) - 1) * 100,
+            # Structure financière spécifique
+            'small_donations_share': (df['Dons_Petits'].mean() / df['Revenus_Total'].mean()) * 100,
+            'legal_share': (df['Depenses_Juridiques'].mean() / df['Depenses_Total'].mean()) * 100,
+            'debt_share': (df['Endettement'].mean() / df['Revenus_Total'].mean()) * 100,
+            # Performance et difficultés
+            'avg_balance': df['Solde_Financier'].mean() * 100,
+            'last_debt': df['Endettement'].iloc[-1],
+            'max_score': df['Score_Presidentielles'].max(),
+            # Santé financière récente (fenêtres glissantes, voir health)
+            'debt_service_5y': health['Service_Dette_5ans'][-1] * 100,
+            'deficit_years_5y': health['Annees_Deficit_5ans'][-1],
+            'debt_to_revenue': health['Dette_Revenus'][-1] * 100,
+            'public_dependency_trend': health['Part_Financement_Public_Moy_5ans'][-1] * 100,
+        }
+    
     def _generate_financial_insights(self, df):
-        """Génère des insights analytiques pour le FN/RN"""
+        """Génère des insights analytiques pour le parti"""
         print(f"🏛️ INSIGHTS ANALYTIQUES - {self.parti} ({self.start_year}-{self.end_year})")
         print("=" * 70)
+        metrics = self.compute_financial_metrics(df)
         
         # 1. Statistiques de base
         print("\n1. 📈 STATISTIQUES GÉNÉRALES:")
-        avg_revenue = df['Revenus_Total'].mean()
-        avg_expenses = df['Depenses_Total'].mean()
-        avg_adherents = df['Adherents'].mean()
-        avg_execution = df['Taux_Execution_Budget'].mean() * 100
-        
-        print(f"Revenus moyens annuels: {avg_revenue:.2f} M€")
-        print(f"Dépenses moyennes annuelles: {avg_expenses:.2f} M€")
-        print(f"Adhérents moyens: {avg_adherents:,.0f} personnes")
-        print(f"Taux d'exécution budgétaire moyen: {avg_execution:.1f}%")
+        print(f"Revenus moyens annuels: {metrics['avg_revenue']:.2f} M€")
+        print(f"Dépenses moyennes annuelles: {metrics['avg_expenses']:.2f} M€")
+        print(f"Adhérents moyens: {metrics['avg_adherents']:,.0f} personnes")
+        print(f"Taux d'exécution budgétaire moyen: {metrics['avg_execution']:.1f}%")
         
         # 2. Croissance historique
         print("\n2. 📊 ÉVOLUTION HISTORIQUE:")
-        revenue_growth = ((df['Revenus_Total'].iloc[-1] / 
-                          df['Revenus_Total'].iloc[0]) - 1) * 100
-        adherents_growth = ((df['Adherents'].iloc[-1] / 
-                           df['Adherents'].iloc[0]) - 1) * 100
-        
-        print(f"Évolution des revenus ({self.start_year}-{self.end_year}): {revenue_growth:.1f}%")
-        print(f"Évolution des adhérents ({self.start_year}-{self.end_year}): {adherents_growth:.1f}%")
+        print(f"Évolution des revenus ({self.start_year}-{self.end_year}): {metrics['revenue_growth']:.1f}%")
+        print(f"Évolution des adhérents ({self.start_year}-{self.end_year}): {metrics['adherents_growth']:.1f}%")
         
         # 3. Structure financière spécifique
         print("\n3. 📋 STRUCTURE FINANCIÈRE SPÉCIFIQUE:")
-        small_donations_share = (df['Dons_Petits'].mean() / df['Revenus_Total'].mean()) * 100
-        legal_share = (df['Depenses_Juridiques'].mean() / df['Depenses_Total'].mean()) * 100
-        debt_share = (df['Endettement'].mean() / df['Revenus_Total'].mean()) * 100
-        
-        print(f"Part des petits dons dans les revenus: {small_donations_share:.1f}%")
-        print(f"Part des dépenses juridiques: {legal_share:.1f}%")
-        print(f"Endettement moyen vs revenus: {debt_share:.1f}%")
+        print(f"Part des petits dons dans les revenus: {metrics['small_donations_share']:.1f}%")
+        print(f"Part des dépenses juridiques: {metrics['legal_share']:.1f}%")
+        print(f"Endettement moyen vs revenus: {metrics['debt_share']:.1f}%")
         
         # 4. Performance et difficultés
         print("\n4. 🎯 PERFORMANCE ET DIFFICULTÉS:")
-        avg_balance = df['Solde_Financier'].mean() * 100
-        last_debt = df['Endettement'].iloc[-1]
-        max_score = df['Score_Presidentielles'].max()
-        
-        print(f"Solde financier moyen: {avg_balance:.1f}% du budget")
-        print(f"Endettement final: {last_debt:.1f} M€")
-        print(f"Meilleur score présidentiel: {max_score:.1f}%")
+        print(f"Solde financier moyen: {metrics['avg_balance']:.1f}% du budget")
+        print(f"Endettement final: {metrics['last_debt']:.1f} M€")
+        print(f"Meilleur score présidentiel: {metrics['max_score']:.1f}%")
+        print(f"Service de la dette (5 dernières années): {metrics['debt_service_5y']:.1f}% des revenus")
+        print(f"Années de déficit (5 dernières années): {metrics['deficit_years_5y']:.0f}")
+        print(f"Dette rapportée aux revenus: {metrics['debt_to_revenue']:.1f}%")
+        print(f"Part du financement public (moyenne 5 ans): {metrics['public_dependency_trend']:.1f}%")
         
         # 5. Spécificités du FN/RN
         print(f"\n5. 🌟 SPÉCIFICITÉS DU FN/RN:")
@@ -1093,15 +466,8 @@ class FN_RN_FinanceAnalyzer:
         
         # 6. Événements marquants
         print("\n6. 📅 ÉVÉNEMENTS MARQUANTS:")
-        print("• 1972: Création du Front National")
-        print("• 1974: Première candidature présidentielle de Jean-Marie Le Pen")
-        print("• 1984: Percée aux élections européennes")
-        print("• 2002: Jean-Marie Le Pen au second tour de la présidentielle")
-        print("• 2011: Marine Le Pen prend la tête du parti")
-        print("• 2014: Controverse des prêts russes")
-        print("• 2017: Marine Le Pen au second tour de la présidentielle")
-        print("• 2018: Changement de nom - Rassemblement National")
-        print("• 2022: Obtention de 89 députés à l'Assemblée nationale")
+        for year, _, description in self.profile.milestones:
+            print(f"• {year}: {description}")
         
         # 7. Recommandations stratégiques
         print("\n7. 💡 RECOMMANDATIONS STRATÉGIQUES:")
@@ -1114,8 +480,15 @@ class FN_RN_FinanceAnalyzer:
         print("• Développer le fundraising numérique")
         print("• Renforcer la transparence financière")
 
-def main():
+def main(argv=None):
     """Fonction principale pour l'analyse du FN/RN"""
+    parser = argparse.ArgumentParser(description="Analyse des finances du FN/RN")
+    parser.add_argument('--excel', action='store_true',
+                        help="classeur Excel avec les quantiles d'un ensemble de 500 répliques (openpyxl)")
+    parser.add_argument('--html', action='store_true',
+                        help="rapport HTML statique FN_RN_rapport/ (fragments SVG en cache dans .cache_rapport)")
+    args = parser.parse_args(argv)
+    
     print("🏛️ ANALYSE DES FINANCES DU FRONT NATIONAL/RASSEMBLEMENT NATIONAL (1972-2025)")
     print("=" * 70)
     
@@ -1127,9 +500,29 @@ def main():
     
     # Sauvegarder les données
     output_file = 'FN_RN_financial_data_1972_2025.csv'
-    financial_data.to_csv(output_file, index=False)
+    write_csv(financial_data, output_file)
     print(f"💾 Données sauvegardées: {output_file}")
     
+    if args.excel or args.html:
+        # Ensemble de répliques et métriques pour le classeur et le rapport
+        ensemble = simulate_batch([analyzer.profile], n_replicates=500)
+        metrics = analyzer.compute_financial_metrics(financial_data)
+    
+    if args.excel:
+        from excel_export import export_excel
+        
+        # Classeur Excel : données, quantiles d'un ensemble de répliques et métriques
+        export_excel('FN_RN_financial_report_1972_2025.xlsx', financial_data,
+                     metrics=metrics, metric_labels=METRIC_LABELS, ensemble=ensemble)
+    
+    if args.html:
+        from html_report import build_report
+        
+        # Rapport HTML statique (fragments SVG mis en cache entre deux exécutions)
+        build_report('FN_RN_rapport', financial_data, analyzer.profile, metrics=metrics,
+                     metric_labels=METRIC_LABELS, ensemble=ensemble, cache_dir='.cache_rapport')
+        print("🌐 Rapport HTML: FN_RN_rapport/index.html")
+    
     # Aperçu des données
     print("\n👀 Aperçu des données:")
     print(financial_data[['Annee', 'Adherents', 'Revenus_Total', 'Depenses_Total', 'Score_Presidentielles']].head())
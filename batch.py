@@ -0,0 +1,211 @@
+"""Moteur de simulation vectorisé multi-partis (axes parti x réplique x année)"""
+import numpy as np
+import pandas as pd
+from calendar_index import calendar_index
+from noise import CorrelatedNoise
+from shocks import apply_shocks
+from schema import apply_schema
+
+
+def regime_index(regime, years):
+    """Indice de la période du régime ((annee_fin, valeur), ...) de chaque année"""
+    ends = np.array([np.inf if end is None else end for end, _ in regime], dtype=float)
+    return np.minimum(np.searchsorted(ends, years, side='left'), len(regime) - 1)
+
+
+def regime_values(regime, years):
+    """Valeurs d'un régime ((annee_fin, valeur), ...) pour chaque année"""
+    values = np.array([value for _, value in regime])
+    return values[regime_index(regime, years)]
+
+
+def calendar_values(profile, spec, years, index=None):
+    """Multiplicateurs calendaires : la première entrée du calendrier qui s'applique l'emporte"""
+    index = index if index is not None else calendar_index(profile, years)
+    out = np.full(len(years), spec.calendar_default)
+    for name, value in reversed(spec.calendar):
+        mask = index.mask(name)
+        if isinstance(value, tuple):
+            value = regime_values(value, years)
+        out = np.where(mask, value, out)
+    return out
+
+
+def indicator_mean(profile, column, years, index=None, stock=None):
+    """Trajectoire déterministe (hors bruit et événements) d'un indicateur
+
+    ``stock`` reprend un indicateur cumulatif à partir du dernier stock
+    calculé (prolongement d'horizon) au lieu du montant initial.
+    """
+    spec = profile.indicators[column]
+    years = np.asarray(years)
+    cal = calendar_values(profile, spec, years, index)
+
+    if spec.kind == 'lookup':
+        keys = np.array([year for year, _ in spec.lookup])
+        values = np.array([value for _, value in spec.lookup])
+        out = np.zeros(len(years), dtype=values.dtype)
+        hit = np.isin(years, keys)
+        out[hit] = values[np.searchsorted(keys, years[hit])]
+        return out + cal
+
+    amount = spec.base if spec.base_key is None else profile.config[spec.base_key] * spec.base
+
+    if spec.kind == 'cumulative':
+        # Stock composé année après année (ex. endettement)
+        steps = np.concatenate([[amount if stock is None else stock], 1 + cal])
+        return np.multiply.accumulate(steps)[1:]
+
+    origin = profile.start_year if spec.origin is None else spec.origin
+    t = np.maximum(0, years - origin)
+    growth = 1 + regime_values(spec.rate, years) * (t / spec.divisor)
+    return amount * growth * regime_values(spec.level, years) * cal
+
+
+def trend_components(profile, column, years, index=None):
+    """Décomposition d'un indicateur 'trend' : moyenne = montant * (1 + taux[periode] * t) * multiplicateur
+
+    Permet d'évaluer d'un coup de nombreux vecteurs de taux candidats
+    (calibration) sans repasser par le profil.
+    """
+    spec = profile.indicators[column]
+    if spec.kind != 'trend':
+        raise ValueError(f"{column} n'est pas un indicateur de type 'trend'")
+    years = np.asarray(years)
+    amount = spec.base if spec.base_key is None else profile.config[spec.base_key] * spec.base
+    origin = profile.start_year if spec.origin is None else spec.origin
+    t = np.maximum(0, years - origin) / spec.divisor
+    multiplier = (regime_values(spec.level, years) * calendar_values(profile, spec, years, index)
+                  * event_factors(profile, column, years))
+    return amount, regime_index(spec.rate, years), t, multiplier
+
+
+def event_factors(profile, column, years):
+    """Multiplicateurs des événements ponctuels du profil pour une colonne"""
+    factors = np.ones(len(years))
+    for year, event_column, factor in profile.events:
+        if event_column == column:
+            factors[years == year] *= factor
+    return factors
+
+
+class BatchResult:
+    """Résultat d'une simulation groupée : un tableau (parti, réplique, année) par colonne"""
+
+    def __init__(self, parties, years, mask, data):
+        self.parties = parties
+        self.years = years
+        self.mask = mask  # (parti, année) : année dans l'horizon du parti
+        self.data = data
+
+    @property
+    def columns(self):
+        return list(self.data)
+
+    @property
+    def n_replicates(self):
+        return next(iter(self.data.values())).shape[1]
+
+    def party_frame(self, party, replicate=0):
+        """DataFrame au format de generate_financial_data pour un parti et une réplique"""
+        p = party if isinstance(party, int) else self.parties.index(party)
+        sel = self.mask[p]
+        frame = {'Annee': self.years[sel]}
+        for column, values in self.data.items():
+            frame[column] = values[p, replicate, sel]
+        return apply_schema(pd.DataFrame(frame))
+
+    def quantiles(self, party=0, q=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Quantiles par année et par indicateur sur l'ensemble des répliques d'un parti"""
+        p = party if isinstance(party, int) else self.parties.index(party)
+        sel = self.mask[p]
+        years = self.years[sel]
+        stacked = np.stack([values[p][:, sel] for values in self.data.values()])  # (col, rép, année)
+        table = np.quantile(stacked, q, axis=1)  # (q, col, année)
+        frame = {
+            'Annee': np.tile(years, len(self.data)),
+            'Indicateur': np.repeat(list(self.data), len(years)),
+        }
+        for level, values in zip(q, table):
+            frame[f'Q{round(level * 100):02d}'] = values.ravel()
+        return pd.DataFrame(frame)
+
+    def to_frame(self):
+        """Table longue Parti / Replique / Annee pour les comparaisons inter-partis"""
+        n_parties, n_replicates, n_years = next(iter(self.data.values())).shape
+        keep = np.broadcast_to(self.mask[:, None, :], (n_parties, n_replicates, n_years)).ravel()
+        idx_p, idx_r, idx_y = np.indices((n_parties, n_replicates, n_years)).reshape(3, -1)[:, keep]
+        frame = {
+            'Parti': pd.Categorical.from_codes(idx_p, self.parties),
+            'Replique': idx_r,
+            'Annee': self.years[idx_y],
+        }
+        for column, values in self.data.items():
+            frame[column] = values.ravel()[keep]
+        return apply_schema(pd.DataFrame(frame))
+
+
+def concat_replicates(results):
+    """Concatène des BatchResult de mêmes partis et années le long de l'axe des répliques"""
+    first = results[0]
+    data = {column: np.concatenate([result.data[column] for result in results], axis=1)
+            for column in first.data}
+    return BatchResult(first.parties, first.years, first.mask, data)
+
+
+def simulate_batch(profiles, n_replicates=1, seed=None, columns=None):
+    """Simule plusieurs partis et répliques en un seul appel vectorisé
+
+    Si un profil déclare des corrélations ou une persistance, le bruit de
+    toutes les colonnes est tiré conjointement (voir noise.CorrelatedNoise) ;
+    sinon chaque colonne reçoit un bruit indépendant. Les chocs aléatoires
+    des profils (voir shocks) sont appliqués ensuite, puis les valeurs forcées.
+    ``columns`` restreint la simulation à quelques colonnes (tests de résistance).
+    """
+    profiles = list(profiles)
+    for profile in profiles[1:]:
+        if set(profile.indicators) != set(profiles[0].indicators):
+            raise ValueError(f"Indicateurs incompatibles pour {profile.parti}")
+    columns = list(profiles[0].indicators) if columns is None else list(columns)
+
+    rng = np.random.default_rng(seed)
+    starts = np.array([profile.start_year for profile in profiles])
+    ends = np.array([profile.end_year for profile in profiles])
+    years = np.arange(starts.min(), ends.max() + 1)
+    mask = (years >= starts[:, None]) & (years <= ends[:, None])
+    shape = (len(profiles), n_replicates, len(years))
+    indexes = [calendar_index(profile, years[mask[p]]) for p, profile in enumerate(profiles)]
+
+    correlated = {}
+    if any(profile.correlations or profile.persistence for profile in profiles):
+        noisy = [column for column in columns if any(profile.indicators[column].sigma for profile in profiles)]
+        draws = CorrelatedNoise.from_profiles(profiles, noisy).draw(rng, n_replicates, len(years))
+        correlated = dict(zip(noisy, draws))
+
+    data = {}
+    for column in columns:
+        mean = np.full((len(profiles), len(years)), np.nan)
+        for p, profile in enumerate(profiles):
+            horizon = years[mask[p]]
+            mean[p, mask[p]] = (indicator_mean(profile, column, horizon, indexes[p])
+                                * event_factors(profile, column, horizon))
+
+        sigma = np.array([profile.indicators[column].sigma for profile in profiles])
+        if column in correlated:
+            values = mean[:, None, :] * correlated[column]
+        elif sigma.any():
+            values = mean[:, None, :] * rng.normal(1.0, sigma[:, None, None], size=shape)
+        else:
+            values = np.repeat(mean[:, None, :], n_replicates, axis=1)
+        data[column] = values
+
+    for p, profile in enumerate(profiles):
+        if profile.shocks:
+            apply_shocks(profile, {column: values[p] for column, values in data.items()}, years, rng)
+
+    for p, profile in enumerate(profiles):
+        for year, column, value in profile.overrides:
+            if column in data:
+                data[column][p, :, (years == year) & mask[p]] = value
+
+    return BatchResult([profile.parti for profile in profiles], years, mask, data)
@@ -0,0 +1,77 @@
+"""Index calendaire partagé : un masque de bits par année pour chaque type d'élection ou d'événement"""
+from functools import lru_cache
+import numpy as np
+
+# Calendriers électoraux nationaux, enregistrés par pays
+CALENDAR_REGISTRY = {
+    "FR": {
+        "municipales": (1977, 1983, 1989, 1995, 2001, 2008, 2014, 2020),
+        "legislatives": (1973, 1978, 1981, 1986, 1988, 1993, 1997, 2002, 2007, 2012, 2017, 2022),
+        "europeennes": (1979, 1984, 1989, 1994, 1999, 2004, 2009, 2014, 2019),
+        "presidentielles": (1974, 1981, 1988, 1995, 2002, 2007, 2012, 2017, 2022),
+    },
+}
+
+
+def register_calendar(country, calendars, replace=False):
+    """Enregistre (ou complète) les calendriers d'un pays : {nom: (annees, ...)}"""
+    if replace or country not in CALENDAR_REGISTRY:
+        CALENDAR_REGISTRY[country] = {}
+    CALENDAR_REGISTRY[country].update({name: tuple(years) for name, years in calendars.items()})
+    _build_index.cache_clear()
+
+
+class CalendarIndex:
+    """Masques annuels des calendriers sur un horizon donné
+
+    Chaque calendrier occupe un bit de ``bits`` (une valeur uint64 par année) ;
+    ``mask(nom)`` renvoie le tableau booléen correspondant.
+    """
+
+    def __init__(self, years, calendars):
+        if len(calendars) > 64:
+            raise ValueError("Au plus 64 calendriers par index")
+        self.years = np.asarray(years)
+        self.names = tuple(calendars)
+        self._bit = {name: np.uint64(1) << np.uint64(i) for i, name in enumerate(self.names)}
+        self.bits = np.zeros(len(self.years), dtype=np.uint64)
+        for name, calendar_years in calendars.items():
+            self.bits[np.isin(self.years, calendar_years)] |= self._bit[name]
+        self._masks = {}
+
+    def __contains__(self, name):
+        return name in self._bit
+
+    def mask(self, name):
+        """Booléen par année : l'année appartient-elle au calendrier ``name``"""
+        if name not in self._masks:
+            bit = self._bit.get(name)
+            mask = np.zeros(len(self.years), dtype=bool) if bit is None else (self.bits & bit) != 0
+            mask.flags.writeable = False
+            self._masks[name] = mask
+        return self._masks[name]
+
+    def any(self, *names):
+        """Booléen par année : l'année appartient à au moins un des calendriers"""
+        combined = np.uint64(0)
+        for name in names:
+            combined |= self._bit.get(name, np.uint64(0))
+        return (self.bits & combined) != 0
+
+
+def profile_calendars(profile):
+    """Calendriers du pays du profil, complétés ou remplacés par ceux du profil"""
+    calendars = dict(CALENDAR_REGISTRY.get(profile.country, {}))
+    calendars.update(profile.calendar)
+    return calendars
+
+
+@lru_cache(maxsize=256)
+def _build_index(years, calendars):
+    return CalendarIndex(years, dict(calendars))
+
+
+def calendar_index(profile, years):
+    """Index calendaire du profil pour ``years``, construit une seule fois par horizon"""
+    calendars = tuple(sorted((name, tuple(values)) for name, values in profile_calendars(profile).items()))
+    return _build_index(tuple(int(year) for year in years), calendars)
@@ -0,0 +1,160 @@
+"""Calibration des taux de croissance par période et des niveaux de bruit sur des données observées"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.optimize import minimize
+from batch import trend_components
+
+RATE_BOUNDS = (-0.5, 1.5)
+SIGMA_BOUNDS = (0.005, 1.0)
+MIN_TREND = 0.05  # la tendance ne descend pas sous 5 % du montant de départ
+PENALTY = 1e12  # -log-vraisemblance d'un point impossible (finie pour l'optimiseur)
+
+
+def _observed_series(observed, column):
+    years = observed['Annee'].to_numpy()
+    values = observed[column].to_numpy(dtype=float, na_value=np.nan)
+    keep = ~np.isnan(values)
+    return years[keep], values[keep]
+
+
+def log_likelihood(profile, column, years, values, rates, sigmas):
+    """Log-vraisemblance de K vecteurs (taux par période, sigma) évalués d'un seul coup
+
+    Le modèle est celui du simulateur : ``obs = moyenne * bruit`` avec
+    ``bruit ~ N(1, sigma)``, soit ``obs ~ N(moyenne, (moyenne * sigma)^2)``.
+    ``rates`` est de forme (K, n_periodes), ``sigmas`` de forme (K,).
+    """
+    return _log_likelihood(trend_components(profile, column, years), values, rates, sigmas)
+
+
+def _log_likelihood(components, values, rates, sigmas):
+    amount, period, t, multiplier = components
+    rates = np.atleast_2d(rates)
+    sigmas = np.atleast_1d(sigmas)[:, None]
+    mean = amount * (1 + rates[:, period] * t) * multiplier  # (K, années)
+    scale = np.abs(mean) * sigmas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (values - mean) / scale
+        ll = -0.5 * z ** 2 - np.log(scale) - 0.5 * np.log(2 * np.pi)
+    ll = ll.sum(axis=1)
+    return np.where(np.isfinite(ll), ll, -PENALTY)
+
+
+def _free_periods(profile, column, years):
+    """Périodes du régime de croissance effectivement contraintes par les observations"""
+    _, period, t, _ = trend_components(profile, column, years)
+    return np.unique(period[t > 0])
+
+
+def _rate_bounds(profile, column, years, free):
+    """Bornes des taux libres : la moyenne reste positive sur chaque période observée
+
+    ``1 + taux * t >= MIN_TREND`` pour le plus grand ``t`` de la période.
+    """
+    _, period, t, _ = trend_components(profile, column, years)
+    bounds = []
+    for p in free:
+        t_max = t[period == p].max()
+        bounds.append((max(RATE_BOUNDS[0], (MIN_TREND - 1) / t_max), RATE_BOUNDS[1]))
+    return bounds
+
+
+def _minimize_start(args):
+    """Optimisation locale depuis un point de départ (exécutée dans un processus du pool)"""
+    profile, column, years, values, free, start = args
+    base_rates = np.array([rate for _, rate in profile.indicators[column].rate], dtype=float)
+    components = trend_components(profile, column, years)
+
+    def objective(theta):
+        rates = base_rates.copy()
+        rates[free] = theta[:-1]
+        return -_log_likelihood(components, values, rates, np.exp(theta[-1]))[0]
+
+    bounds = _rate_bounds(profile, column, years, free) + [tuple(np.log(SIGMA_BOUNDS))]
+    result = minimize(objective, start, method='L-BFGS-B', bounds=bounds)
+    if not result.success or np.allclose(result.x, start):
+        # Arrêt prématuré (recherche linéaire bloquée) : on poursuit sans gradient
+        polished = minimize(objective, result.x, method='Nelder-Mead', bounds=bounds,
+                            options={'maxiter': 4000 * len(start), 'xatol': 1e-6, 'fatol': 1e-8})
+        if polished.fun < result.fun:
+            result = polished
+    return result.fun, result.x
+
+
+class CalibrationResult:
+    """Paramètres calibrés d'un indicateur"""
+
+    def __init__(self, column, rate, sigma, log_likelihood, n_observations):
+        self.column = column
+        self.rate = rate
+        self.sigma = sigma
+        self.log_likelihood = log_likelihood
+        self.n_observations = n_observations
+
+    def __repr__(self):
+        rates = ', '.join(f"{end}: {value:.3f}" for end, value in self.rate)
+        return (f"CalibrationResult({self.column}, taux=[{rates}], sigma={self.sigma:.3f}, "
+                f"logL={self.log_likelihood:.1f}, n={self.n_observations})")
+
+
+def calibrate_indicator(profile, column, observed, n_candidates=4096, n_starts=8,
+                        seed=None, executor=None):
+    """Calibre les taux par période et le sigma d'un indicateur 'trend'
+
+    Un criblage vectorisé de ``n_candidates`` vecteurs tirés au hasard
+    sélectionne les ``n_starts`` meilleurs points de départ, raffinés ensuite
+    par L-BFGS-B (en parallèle si un ``executor`` est fourni).
+    """
+    years, values = _observed_series(observed, column)
+    spec = profile.indicators[column]
+    base_rates = np.array([rate for _, rate in spec.rate], dtype=float)
+    free = _free_periods(profile, column, years)
+    if len(values) < 2 or len(free) == 0:
+        raise ValueError(f"Pas assez d'observations pour calibrer {column}")
+
+    # Criblage : tous les candidats évalués en un seul appel
+    rng = np.random.default_rng(seed)
+    low, high = np.array(_rate_bounds(profile, column, years, free)).T
+    candidates = np.tile(base_rates, (n_candidates, 1))
+    candidates[:, free] = rng.uniform(low, high, size=(n_candidates, len(free)))
+    candidates[0] = base_rates
+    log_sigmas = rng.uniform(*np.log(SIGMA_BOUNDS), size=n_candidates)
+    log_sigmas[0] = np.log(max(spec.sigma, SIGMA_BOUNDS[0]))
+    ll = log_likelihood(profile, column, years, values, candidates, np.exp(log_sigmas))
+    best = np.argsort(-ll)[:n_starts]
+    starts = np.column_stack([candidates[best][:, free], log_sigmas[best]])
+
+    tasks = [(profile, column, years, values, free, start) for start in starts]
+    runs = list(executor.map(_minimize_start, tasks) if executor else map(_minimize_start, tasks))
+    fun, theta = min(runs, key=lambda run: run[0])
+
+    rates = base_rates.copy()
+    rates[free] = theta[:-1]
+    rate = tuple((end, float(value)) for (end, _), value in zip(spec.rate, rates))
+    return CalibrationResult(column, rate, float(np.exp(theta[-1])), -float(fun), len(values))
+
+
+def calibrate_profile(profile, observed, columns=None, n_jobs=None, **kwargs):
+    """Calibre tous les indicateurs 'trend' observés ; retourne (profil calibré, résultats)
+
+    Les départs multiples sont répartis sur un pool de ``n_jobs`` processus.
+    """
+    if columns is None:
+        columns = [column for column, spec in profile.indicators.items()
+                   if spec.kind == 'trend' and any(rate for _, rate in spec.rate)
+                   and column in observed and observed[column].notna().sum() >= 2]
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for column in columns:
+            try:
+                results[column] = calibrate_indicator(profile, column, observed,
+                                                      executor=executor, **kwargs)
+            except ValueError as exc:
+                print(f"⚠️ {exc}")
+
+    for result in results.values():
+        # Un indicateur déterministe (sigma nul) le reste
+        sigma = result.sigma if profile.indicators[result.column].sigma else 0.0
+        profile = profile.with_indicator(result.column, rate=result.rate, sigma=sigma)
+    return profile, results
@@ -0,0 +1,209 @@
+"""Comparaison de deux exécutions stockées : écarts, statistiques KS / décalages de quantiles, rapport classé"""
+import os
+import numpy as np
+import pandas as pd
+from scipy.special import kolmogorov
+
+N_BINS = 512  # résolution des histogrammes par (colonne, année)
+CHUNKSIZE = 200000  # lignes lues à la fois
+QUANTILES = (0.05, 0.5, 0.95)
+KEY_COLUMNS = ('Parti', 'Replique', 'Annee')
+
+
+def _store_columns(path):
+    from incremental import EnsembleStore
+    return EnsembleStore(path).columns
+
+
+def source_columns(source):
+    """Colonnes d'indicateurs d'une source (DataFrame, CSV, Parquet ou EnsembleStore)"""
+    if isinstance(source, pd.DataFrame):
+        header = source.columns
+    elif os.path.isdir(source):
+        header = _store_columns(source)
+    elif str(source).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        header = pq.ParquetFile(source).schema_arrow.names
+    else:
+        header = pd.read_csv(source, nrows=0).columns
+    return [column for column in header if column not in KEY_COLUMNS]
+
+
+def iter_chunks(source, columns, party=None, chunksize=CHUNKSIZE):
+    """Parcourt une source par blocs de lignes (Annee + colonnes), sans la charger entièrement
+
+    Sources acceptées : DataFrame, CSV, Parquet (pyarrow) ou répertoire
+    d'EnsembleStore (lecture mémoire-mappée, un bloc d'années à la fois).
+    """
+    usecols = ['Annee'] + list(columns)
+    if isinstance(source, pd.DataFrame):
+        frames = (source.iloc[i:i + chunksize] for i in range(0, len(source), chunksize))
+    elif os.path.isdir(source):
+        frames = _iter_store(source, columns, chunksize)
+    elif str(source).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        names = usecols + (['Parti'] if party is not None and 'Parti' in parquet.schema_arrow.names else [])
+        frames = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunksize, columns=names))
+    else:
+        header = pd.read_csv(source, nrows=0).columns
+        names = usecols + (['Parti'] if party is not None and 'Parti' in header else [])
+        frames = pd.read_csv(source, usecols=names, chunksize=chunksize,
+                             dtype={column: 'float64' for column in columns})
+    for frame in frames:
+        if party is not None and 'Parti' in frame:
+            frame = frame[frame['Parti'] == party]
+        yield frame[usecols]
+
+
+def _iter_store(path, columns, chunksize):
+    from incremental import EnsembleStore
+    store = EnsembleStore(path)
+    years = store.years
+    step = max(1, chunksize // store.manifest['n_replicates'])
+    for start in range(0, len(years), step):
+        block = years[start:start + step]
+        frame = {'Annee': np.repeat(block, store.manifest['n_replicates'])}
+        for column in columns:
+            frame[column] = np.asarray(store.read(column)[start:start + step], dtype=float).ravel()
+        yield pd.DataFrame(frame)
+
+
+class _RunSummary:
+    """Statistiques cumulées d'une exécution par (colonne, année), alimentées bloc par bloc"""
+
+    def __init__(self, columns, years):
+        self.columns = columns
+        self.years = years
+        shape = (len(columns), len(years))
+        self.count = np.zeros(shape)
+        self.total = np.zeros(shape)
+        self.squares = np.zeros(shape)
+        self.low = np.full(shape, np.inf)
+        self.high = np.full(shape, -np.inf)
+        self.hist = None
+
+    def _cells(self, frame):
+        year = np.searchsorted(self.years, frame['Annee'].to_numpy())
+        for k, column in enumerate(self.columns):
+            values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+            ok = ~np.isnan(values)
+            yield k, year[ok], values[ok]
+
+    def add_moments(self, frame):
+        n_years = len(self.years)
+        for k, year, values in self._cells(frame):
+            self.count[k] += np.bincount(year, minlength=n_years)
+            self.total[k] += np.bincount(year, weights=values, minlength=n_years)
+            self.squares[k] += np.bincount(year, weights=values * values, minlength=n_years)
+            np.minimum.at(self.low[k], year, values)
+            np.maximum.at(self.high[k], year, values)
+
+    def add_histogram(self, frame, low, width):
+        n_years = len(self.years)
+        if self.hist is None:
+            self.hist = np.zeros((len(self.columns), n_years, N_BINS))
+        for k, year, values in self._cells(frame):
+            bins = np.clip(((values - low[k, year]) / width[k, year]).astype(int), 0, N_BINS - 1)
+            self.hist[k] += np.bincount(year * N_BINS + bins, minlength=n_years * N_BINS).reshape(n_years, N_BINS)
+
+
+def _scan_years(source, columns, party, chunksize):
+    years = set()
+    for frame in iter_chunks(source, columns[:1], party, chunksize):
+        years.update(np.unique(frame['Annee'].to_numpy()).tolist())
+    return years
+
+
+def _hist_quantiles(cdf, low, width, q):
+    """Quantile interpolé dans l'histogramme cumulé (colonne, année, bin)"""
+    position = np.minimum((cdf < q).sum(axis=-1), N_BINS - 1)
+    before = np.take_along_axis(cdf, np.maximum(position - 1, 0)[..., None], -1)[..., 0]
+    before = np.where(position == 0, 0.0, before)
+    after = np.take_along_axis(cdf, position[..., None], -1)[..., 0]
+    fraction = np.where(after > before, (q - before) / np.where(after > before, after - before, 1), 0.5)
+    return low + (position + fraction) * width
+
+
+def compare_runs(run_a, run_b, columns=None, party=None, chunksize=CHUNKSIZE, quantiles=QUANTILES):
+    """Compare deux exécutions alignées par année et par colonne
+
+    Passages en flux sur chaque source (années présentes sur une seule
+    colonne, moments et bornes, puis histogrammes sur des bornes communes) :
+    seuls des agrégats (colonne, année) restent en mémoire. La statistique KS et les décalages
+    de quantiles sont donc exacts à la résolution ``N_BINS`` près ; les
+    moyennes et écarts-types sont exacts. Renvoie une table longue
+    Indicateur / Annee avec un tableau de statistiques par cellule.
+    """
+    if columns is None:
+        columns = [column for column in source_columns(run_a) if column in set(source_columns(run_b))]
+    columns = [column for column in columns if column != 'Annee']
+    years = np.array(sorted(_scan_years(run_a, columns, party, chunksize)
+                            | _scan_years(run_b, columns, party, chunksize)))
+
+    runs = [_RunSummary(columns, years), _RunSummary(columns, years)]
+    for summary, source in zip(runs, (run_a, run_b)):
+        for frame in iter_chunks(source, columns, party, chunksize):
+            summary.add_moments(frame)
+
+    low = np.minimum(runs[0].low, runs[1].low)
+    high = np.maximum(runs[0].high, runs[1].high)
+    width = np.where(high > low, (high - low) / N_BINS, 1.0)
+    width = np.where(np.isfinite(width), width, 1.0)
+    low = np.where(np.isfinite(low), low, 0.0)
+    for summary, source in zip(runs, (run_a, run_b)):
+        for frame in iter_chunks(source, columns, party, chunksize):
+            summary.add_histogram(frame, low, width)
+
+    a, b = runs
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_a, mean_b = a.total / a.count, b.total / b.count
+        var_a = np.maximum(a.squares / a.count - mean_a ** 2, 0)
+        var_b = np.maximum(b.squares / b.count - mean_b ** 2, 0)
+        delta = mean_b - mean_a
+        relative = delta / np.abs(mean_a)
+        pooled = np.sqrt((var_a + var_b) / 2)
+        effect = np.where(pooled > 0, delta / pooled, np.where(delta == 0, 0.0, np.sign(delta) * np.inf))
+        cdf_a = np.cumsum(a.hist, axis=-1) / a.count[..., None]
+        cdf_b = np.cumsum(b.hist, axis=-1) / b.count[..., None]
+        ks = np.max(np.abs(cdf_a - cdf_b), axis=-1)
+        n_eff = a.count * b.count / (a.count + b.count)
+        p_value = np.clip(kolmogorov(ks * np.sqrt(n_eff)), 0, 1)
+
+    frame = {
+        'Indicateur': np.repeat(columns, len(years)),
+        'Annee': np.tile(years, len(columns)),
+        'N_A': a.count.ravel().astype(np.int64),
+        'N_B': b.count.ravel().astype(np.int64),
+        'Moyenne_A': mean_a.ravel(),
+        'Moyenne_B': mean_b.ravel(),
+        'Delta': delta.ravel(),
+        'Delta_Relatif': relative.ravel(),
+        'Effet_Standardise': effect.ravel(),
+        'KS': ks.ravel(),
+        'p_valeur': p_value.ravel(),
+    }
+    for q in quantiles:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shift = _hist_quantiles(cdf_b, low, width, q) - _hist_quantiles(cdf_a, low, width, q)
+        frame[f'Decalage_Q{round(q * 100):02d}'] = shift.ravel()
+    return pd.DataFrame(frame)
+
+
+def rank_changes(comparison, alpha=0.01):
+    """Rapport classé par indicateur : plus fort écart de distribution et années significatives"""
+    significant = (comparison['p_valeur'] < alpha) & (comparison[['N_A', 'N_B']].min(axis=1) > 1)
+    changed = comparison['Delta'].abs() > 0
+    work = comparison.assign(Significatif=significant, Modifie=changed, KS=comparison['KS'].fillna(0),
+                             Effet_Absolu=comparison['Effet_Standardise'].abs())
+    peak = work.loc[work.groupby('Indicateur')['KS'].idxmax(), ['Indicateur', 'Annee', 'KS', 'Delta_Relatif']]
+    summary = work.groupby('Indicateur').agg(
+        Annees_Modifiees=('Modifie', 'sum'),
+        Annees_Significatives=('Significatif', 'sum'),
+        Effet_Moyen=('Effet_Absolu', 'mean'),
+        Delta_Relatif_Moyen=('Delta_Relatif', lambda s: s.abs().mean()),
+    ).reset_index()
+    report = summary.merge(peak.rename(columns={'Annee': 'Annee_KS_Max', 'KS': 'KS_Max',
+                                                'Delta_Relatif': 'Delta_Relatif_KS_Max'}), on='Indicateur')
+    return report.sort_values(['Annees_Significatives', 'KS_Max', 'Delta_Relatif_Moyen'],
+                              ascending=False).reset_index(drop=True)
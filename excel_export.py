@@ -0,0 +1,89 @@
+"""Export Excel en flux (openpyxl write-only) : données, quantiles d'ensemble et métriques"""
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from schema import COLUMN_SCHEMA
+
+ROW_BLOCK = 10_000  # lignes converties en valeurs Python à la fois
+PERCENT_PREFIXES = ('Taux_', 'Ratio_', 'Dependance_', 'Solde_')
+
+
+def number_format(column, dtype=None):
+    """Format numérique Excel natif d'une colonne"""
+    if column == 'Annee':
+        return '0'
+    if column.startswith(PERCENT_PREFIXES):
+        return '0.0%'
+    kind = np.dtype(COLUMN_SCHEMA[column][0]).kind if column in COLUMN_SCHEMA else getattr(dtype, 'kind', 'f')
+    if kind in 'iu':
+        return '#,##0'
+    if kind == 'f':
+        return '#,##0.00'
+    return 'General'
+
+
+def _write_frame(workbook, title, df, formats=None):
+    """Écrit un DataFrame dans une feuille en flux, par blocs de ROW_BLOCK lignes"""
+    sheet = workbook.create_sheet(title)
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(sheet, value=str(column))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    sheet.freeze_panes = 'A2'
+
+    # Une cellule stylée par colonne, réutilisée à chaque ligne (écrite dès l'ajout)
+    formats = formats or {}
+    cells = []
+    for column in df.columns:
+        cell = WriteOnlyCell(sheet)
+        cell.number_format = formats.get(column) or number_format(column, df[column].dtype)
+        cells.append(cell)
+
+    for start in range(0, len(df), ROW_BLOCK):
+        block = df.iloc[start:start + ROW_BLOCK]
+        columns = []
+        for column in block.columns:
+            values = block[column].to_numpy()
+            if values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), None, values)
+            elif values.dtype.kind == 'O':
+                values = np.where(block[column].isna().to_numpy(), None, values)
+            columns.append(values.tolist())
+        for row in zip(*columns):
+            for cell, value in zip(cells, row):
+                cell.value = value
+            sheet.append(cells)
+
+
+def export_excel(path, df, metrics=None, metric_labels=None, ensemble=None, party=0,
+                 quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """Exporte un classeur : feuille Donnees, Quantiles (si ensemble) et Indicateurs (si métriques)
+
+    ``metrics`` est le dictionnaire de compute_financial_metrics (libellés et
+    unités dans ``metric_labels``) ; ``ensemble`` un BatchResult dont on
+    exporte les quantiles annuels pour ``party``.
+    """
+    metric_labels = metric_labels or {}
+    workbook = Workbook(write_only=True)
+    _write_frame(workbook, 'Donnees', df)
+
+    if ensemble is not None:
+        table = ensemble.quantiles(party, quantiles)
+        formats = {column: '#,##0.000' for column in table.columns if column.startswith('Q')}
+        _write_frame(workbook, 'Quantiles', table, formats)
+
+    if metrics is not None:
+        labels = [metric_labels.get(key, (key, '')) for key in metrics]
+        table = pd.DataFrame({
+            'Indicateur': [label for label, _ in labels],
+            'Valeur': [float(value) for value in metrics.values()],
+            'Unite': [unit for _, unit in labels],
+        })
+        _write_frame(workbook, 'Indicateurs', table, {'Valeur': '#,##0.00'})
+
+    workbook.save(path)
+    print(f"📗 Classeur Excel exporté: {path}")
@@ -0,0 +1,121 @@
+"""Prévisions au-delà de end_year par modèle statistique (ETS / ARIMA) pour chaque indicateur"""
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+
+MODELS = ('ets', 'arima')
+
+
+def _fit_model(series, model, start_params=None):
+    """Ajuste un modèle sur une série annuelle (index PeriodIndex)"""
+    if model == 'ets':
+        from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+        return ETSModel(series, error='add', trend='add', damped_trend=True).fit(
+            disp=False, start_params=start_params)
+    if model == 'arima':
+        from statsmodels.tsa.arima.model import ARIMA
+        return ARIMA(series, order=(1, 1, 0), trend='t').fit(start_params=start_params)
+    raise ValueError(f"Modèle inconnu: {model} (attendu: {', '.join(MODELS)})")
+
+
+def _forecast_one(task):
+    """Ajuste et projette une colonne (exécutée dans un processus du pool)"""
+    column, years, values, horizon, model, alpha, start_params = task
+    series = pd.Series(values, index=pd.period_range(str(years[0]), periods=len(years), freq='Y'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            fitted = _fit_model(series, model, start_params)
+        except (ValueError, np.linalg.LinAlgError):
+            if start_params is None:
+                raise
+            fitted = _fit_model(series, model)  # paramètres précédents inutilisables
+        if model == 'ets':
+            summary = fitted.get_prediction(start=len(series), end=len(series) + horizon - 1).summary_frame(alpha=alpha)
+            lower, upper = summary['pi_lower'], summary['pi_upper']
+        else:
+            summary = fitted.get_forecast(horizon).summary_frame(alpha=alpha)
+            lower, upper = summary['mean_ci_lower'], summary['mean_ci_upper']
+    forecast = pd.DataFrame({
+        'Indicateur': column,
+        'Annee': np.arange(years[-1] + 1, years[-1] + horizon + 1),
+        'Prevision': summary['mean'].to_numpy(),
+        'Borne_Basse': lower.to_numpy(),
+        'Borne_Haute': upper.to_numpy(),
+    })
+    return column, forecast, np.asarray(fitted.params)
+
+
+class ForecastCache:
+    """Paramètres ajustés par (indicateur, modèle), réutilisés comme point de départ
+
+    Si la série est inchangée, la prévision mémorisée est renvoyée telle
+    quelle ; sinon (ex. une année de plus) l'ajustement repart des
+    paramètres précédents. Avec ``path``, le cache est persistant (pickle).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as handle:
+                self._entries = pickle.load(handle)
+
+    @staticmethod
+    def digest(years, values, horizon, alpha):
+        raw = np.concatenate([years.astype(float), values, [horizon, alpha]])
+        return hashlib.sha1(raw.tobytes()).hexdigest()
+
+    def get(self, column, model):
+        return self._entries.get((column, model))
+
+    def put(self, column, model, digest, params, forecast):
+        self._entries[(column, model)] = {'digest': digest, 'params': params, 'forecast': forecast}
+
+    def save(self):
+        if self.path is not None:
+            with open(self.path, 'wb') as handle:
+                pickle.dump(self._entries, handle)
+
+
+def forecast_indicators(df, horizon=5, model='ets', columns=None, alpha=0.10, n_jobs=None, cache=None):
+    """Projette chaque indicateur sur ``horizon`` années avec intervalles de prévision
+
+    Les ajustements indicateur par indicateur sont répartis sur ``n_jobs``
+    processus. Retourne une table longue Indicateur / Annee / Prevision /
+    Borne_Basse / Borne_Haute.
+    """
+    df = df.sort_values('Annee')
+    years = df['Annee'].to_numpy(dtype=int)
+    if columns is None:
+        columns = [column for column in df.columns
+                   if column != 'Annee' and pd.api.types.is_numeric_dtype(df[column])]
+
+    forecasts, tasks, digests = [], [], {}
+    for column in columns:
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        digest = ForecastCache.digest(years, values, horizon, alpha)
+        entry = cache.get(column, model) if cache is not None else None
+        if entry is not None and entry['digest'] == digest:
+            forecasts.append(entry['forecast'])
+            continue
+        digests[column] = digest
+        start_params = entry['params'] if entry is not None else None
+        tasks.append((column, years, values, horizon, model, alpha, start_params))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for column, forecast, params in executor.map(_forecast_one, tasks):
+                forecasts.append(forecast)
+                if cache is not None:
+                    cache.put(column, model, digests[column], params, forecast)
+        if cache is not None:
+            cache.save()
+
+    order = {column: i for i, column in enumerate(columns)}
+    forecasts.sort(key=lambda forecast: order[forecast['Indicateur'].iat[0]])
+    return pd.concat(forecasts, ignore_index=True)
@@ -0,0 +1,124 @@
+"""Indicateurs de santé financière sur fenêtres glissantes, calculés par sommes cumulées"""
+import numpy as np
+import pandas as pd
+
+WINDOWS = (3, 5)
+
+
+def _window_diff(cumsum, window):
+    out = cumsum.copy()
+    out[..., window:] -= cumsum[..., :-window]
+    return out
+
+
+def rolling_sum(values, window, min_periods=None, _counts=False):
+    """Somme glissante sur le dernier axe (années) par différence de sommes cumulées
+
+    Les valeurs manquantes (NaN, années hors de l'horizon d'un parti) ne
+    comptent pas ; une fenêtre avec moins de ``min_periods`` valeurs (par
+    défaut ``window``) vaut NaN. Fonctionne pour tout tableau (..., année).
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    total = _window_diff(np.cumsum(np.where(valid, values, 0.0), axis=-1), window)
+    counts = _window_diff(np.cumsum(valid, axis=-1), window)
+    total[counts < (window if min_periods is None else min_periods)] = np.nan
+    return (total, counts) if _counts else total
+
+
+def rolling_mean(values, window, min_periods=None):
+    total, counts = rolling_sum(values, window, min_periods, _counts=True)
+    return total / np.maximum(counts, 1)
+
+
+def expanding_mean(values):
+    """Moyenne cumulative depuis la première année (valeurs manquantes ignorées)"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    counts = np.cumsum(valid, axis=-1)
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, np.cumsum(np.where(valid, values, 0.0), axis=-1) / np.maximum(counts, 1), np.nan)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def health_metrics(values, windows=WINDOWS):
+    """Indicateurs de santé financière à partir de {colonne: tableau (..., année)}
+
+    Ratio de service de la dette, soldes et années de déficit glissants,
+    dette rapportée aux revenus et dépendance au financement public, en
+    version annuelle, glissante (``windows``) et cumulative. Les métriques
+    dont les colonnes manquent sont omises.
+    """
+    has = lambda *columns: all(column in values for column in columns)
+    out = {}
+    if has('Remboursements_Emprunts', 'Revenus_Total'):
+        out['Service_Dette'] = _ratio(values['Remboursements_Emprunts'], values['Revenus_Total'])
+        for window in windows:
+            out[f'Service_Dette_{window}ans'] = _ratio(rolling_sum(values['Remboursements_Emprunts'], window),
+                                                       rolling_sum(values['Revenus_Total'], window))
+    if has('Revenus_Total', 'Depenses_Total'):
+        balance = np.asarray(values['Revenus_Total'], dtype=float) - values['Depenses_Total']
+        for window in windows:
+            out[f'Solde_Cumule_{window}ans'] = rolling_sum(balance, window)
+    if has('Solde_Financier'):
+        solde = np.asarray(values['Solde_Financier'], dtype=float)
+        deficit = np.where(np.isnan(solde), np.nan, solde < 0)
+        for window in windows:
+            out[f'Solde_Financier_Moy_{window}ans'] = rolling_mean(values['Solde_Financier'], window)
+            out[f'Annees_Deficit_{window}ans'] = rolling_sum(deficit, window)
+    if has('Endettement', 'Revenus_Total'):
+        out['Dette_Revenus'] = _ratio(values['Endettement'], values['Revenus_Total'])
+        for window in windows:
+            out[f'Dette_Revenus_Moy_{window}ans'] = rolling_mean(out['Dette_Revenus'], window)
+    if has('Financement_Public', 'Revenus_Total'):
+        out['Part_Financement_Public'] = _ratio(values['Financement_Public'], values['Revenus_Total'])
+        for window in windows:
+            out[f'Part_Financement_Public_Moy_{window}ans'] = rolling_mean(out['Part_Financement_Public'], window)
+        out['Part_Financement_Public_Cumulee'] = expanding_mean(out['Part_Financement_Public'])
+    return out
+
+
+def rolling_indicators(values, windows=WINDOWS, expanding=True):
+    """Moyennes glissantes (et cumulatives) de tous les indicateurs : {f'{colonne}_Moy_{n}ans': tableau}"""
+    out = {}
+    for column, array in values.items():
+        for window in windows:
+            out[f'{column}_Moy_{window}ans'] = rolling_mean(array, window)
+        if expanding:
+            out[f'{column}_Moy_Cumulee'] = expanding_mean(array)
+    return out
+
+
+def health_table(data, windows=WINDOWS):
+    """Table longue (Parti, Replique,) Annee / Metrique / Valeur
+
+    ``data`` est un DataFrame au format de generate_financial_data ou un
+    BatchResult (toutes les répliques traitées d'un seul passage).
+    """
+    if isinstance(data, pd.DataFrame):
+        metrics = health_metrics({column: data[column].to_numpy(dtype=float, na_value=np.nan)
+                                  for column in data.columns if column != 'Annee'}, windows)
+        years = data['Annee'].to_numpy()
+        return pd.DataFrame({
+            'Annee': np.tile(years, len(metrics)),
+            'Metrique': np.repeat(list(metrics), len(years)),
+            'Valeur': np.concatenate(list(metrics.values())) if metrics else [],
+        })
+
+    # BatchResult : tableaux (parti, réplique, année) restreints à l'horizon de chaque parti
+    metrics = health_metrics(data.data, windows)
+    n_parties, n_replicates, n_years = next(iter(data.data.values())).shape
+    keep = np.broadcast_to(data.mask[:, None, :], (n_parties, n_replicates, n_years)).ravel()
+    idx_p, idx_r, idx_y = np.indices((n_parties, n_replicates, n_years)).reshape(3, -1)[:, keep]
+    n = len(idx_p)
+    return pd.DataFrame({
+        'Parti': pd.Categorical.from_codes(np.tile(idx_p, len(metrics)), data.parties),
+        'Replique': np.tile(idx_r, len(metrics)),
+        'Annee': np.tile(data.years[idx_y], len(metrics)),
+        'Metrique': pd.Categorical(np.repeat(list(metrics), n), categories=list(metrics)),
+        'Valeur': np.concatenate([values.ravel()[keep] for values in metrics.values()]),
+    })
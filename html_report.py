@@ -0,0 +1,346 @@
+"""Rapport HTML statique : graphiques SVG légers, tableaux d'insights et données compressées"""
+import hashlib
+import html
+import os
+import numpy as np
+from health import health_metrics
+from schema import write_csv
+
+RENDER_VERSION = 1  # à incrémenter quand le rendu SVG change (invalide le cache)
+WIDTH, HEIGHT = 560, 320
+MAX_POINTS = 200  # points par série après sous-échantillonnage
+MARGIN = {'left': 52, 'right': 52, 'top': 34, 'bottom': 58}
+
+# Panneaux : (clé, titre, série principale, série secondaire) ; série = (colonne, libellé, couleur, type, échelle)
+# Les colonnes peuvent être des indicateurs ou des métriques de health.health_metrics.
+PANELS = (
+    ('revenus_depenses', 'Évolution des Revenus et Dépenses (M€)', (
+        ('Revenus_Total', 'Revenus Totaux', '#000080', 'line', 1),
+        ('Depenses_Total', 'Dépenses Totales', '#FF0000', 'line', 1),
+    ), ()),
+    ('structure_revenus', 'Structure des Revenus (M€)', (
+        ('Cotisations_Adherents', 'Cotisations', '#000080', 'stack', 1),
+        ('Dons_Petits', 'Dons Petits', '#FF0000', 'stack', 1),
+        ('Dons_Grands', 'Dons Grands', '#8B0000', 'stack', 1),
+        ('Financement_Public', 'Financement Public', '#000000', 'stack', 1),
+        ('Revenus_Evenements', 'Événements', '#C0C0C0', 'stack', 1),
+        ('Emprunts', 'Emprunts', '#800000', 'stack', 1),
+        ('Aides_Etrangeres', 'Aides Étrangères', '#003366', 'stack', 1),
+    ), ()),
+    ('structure_depenses', 'Structure des Dépenses (M€)', (
+        ('Depenses_Personnel', 'Personnel', '#000080', 'stack', 1),
+        ('Depenses_Campagnes', 'Campagnes', '#FF0000', 'stack', 1),
+        ('Depenses_Communication', 'Communication', '#8B0000', 'stack', 1),
+        ('Depenses_Juridiques', 'Dépenses Juridiques', '#000000', 'stack', 1),
+        ('Depenses_Fonctionnement', 'Fonctionnement', '#C0C0C0', 'stack', 1),
+        ('Remboursements_Emprunts', 'Remboursements', '#800000', 'stack', 1),
+    ), ()),
+    ('adherents_scores', 'Adhérents et Scores Présidentiels', (
+        ('Adherents', 'Adhérents (milliers)', '#000080', 'bar', 1e-3),
+    ), (
+        ('Score_Presidentielles', 'Score Présidentielles (%)', '#FF0000', 'line', 1),
+    )),
+    ('investissements', 'Investissements Stratégiques (M€)', (
+        ('Investissement_Communication', 'Communication', '#000080', 'line', 1),
+        ('Investissement_Numérique', 'Numérique', '#FF0000', 'line', 1),
+        ('Investissement_Formation', 'Formation', '#8B0000', 'line', 1),
+        ('Investissement_International', 'International', '#000000', 'line', 1),
+    ), ()),
+    ('indicateurs_specifiques', 'Indicateurs Spécifiques FN/RN', (
+        ('Taux_Execution_Budget', "Taux d'Exécution (%)", '#000080', 'bar', 100),
+    ), (
+        ('Ratio_Depenses_Juridiques', 'Dépenses Juridiques (% budget)', '#FF0000', 'line', 100),
+    )),
+    ('elus', 'Évolution des Élus', (
+        ('Elus_Locaux', 'Élus Locaux (centaines)', '#000080', 'line', 1e-2),
+    ), (
+        ('Elus_Nationaux', 'Élus Nationaux', '#FF0000', 'line', 1),
+    )),
+    ('situation_financiere', 'Situation Financière et Endettement', (
+        ('Solde_Financier', 'Solde Financier (% du budget)', '#FF0000', 'bar', 100),
+        ('Solde_Financier_Moy_5ans', 'Solde moyen glissant 5 ans (%)', '#000080', 'line', 100),
+        ('Service_Dette_3ans', 'Service de la dette sur 3 ans (% des revenus)', '#FF8C00', 'line', 100),
+    ), (
+        ('Endettement', 'Endettement (M€)', '#8B0000', 'line', 1),
+    )),
+)
+
+FAN_COLUMNS = (('Revenus_Total', 'Revenus Totaux (M€)', '#000080'),
+               ('Endettement', 'Endettement (M€)', '#8B0000'),
+               ('Solde_Financier', 'Solde Financier (ratio)', '#FF0000'))
+
+
+def downsample(x, y, max_points=MAX_POINTS):
+    """Sous-échantillonnage « largest triangle three buckets » : garde la forme visuelle d'une série"""
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = [0]
+    for start, end, next_end in zip(edges[:-1], edges[1:], np.append(edges[2:], n)):
+        after = slice(end, max(next_end, end + 1))
+        ax, ay = x[after].mean(), y[after].mean()
+        px, py = x[keep[-1]], y[keep[-1]]
+        area = np.abs((px - ax) * (y[start:end] - py) - (px - x[start:end]) * (ay - py))
+        keep.append(start + int(np.argmax(area)))
+    keep.append(n - 1)
+    return x[keep], y[keep]
+
+
+def _bucket_means(x, y, max_points=MAX_POINTS):
+    """Moyennes par paquets (barres) lorsque la série dépasse ``max_points``"""
+    if len(x) <= max_points:
+        return x, y
+    groups = np.array_split(np.arange(len(x)), max_points)
+    return np.array([x[g].mean() for g in groups]), np.array([y[g].mean() for g in groups])
+
+
+def _nice_ticks(low, high, count=5):
+    if not np.isfinite(low) or not np.isfinite(high) or low == high:
+        low, high = (low - 1, high + 1) if np.isfinite(low) else (0, 1)
+    raw = (high - low) / count
+    step = 10 ** np.floor(np.log10(raw))
+    step *= next(m for m in (1, 2, 2.5, 5, 10) if m * step >= raw)
+    return np.arange(np.floor(low / step) * step, high + step * 0.999, step)
+
+
+def _fmt(value):
+    return f"{value:,.0f}".replace(',', ' ') if abs(value) >= 100 else f"{value:.3g}"
+
+
+class _Axes:
+    def __init__(self, x_range, ticks):
+        self.x0, self.x1 = x_range
+        self.ticks = ticks
+        self.y0, self.y1 = ticks[0], ticks[-1]
+        self.left, self.right = MARGIN['left'], WIDTH - MARGIN['right']
+        self.top, self.bottom = MARGIN['top'], HEIGHT - MARGIN['bottom']
+
+    def x(self, values):
+        span = (self.x1 - self.x0) or 1
+        return self.left + (np.asarray(values, dtype=float) - self.x0 + 0.5) / (span + 1) * (self.right - self.left)
+
+    def y(self, values):
+        span = (self.y1 - self.y0) or 1
+        return self.bottom - (np.asarray(values, dtype=float) - self.y0) / span * (self.bottom - self.top)
+
+    def bar_width(self):
+        return 0.8 * (self.right - self.left) / ((self.x1 - self.x0) + 1)
+
+
+def _series_range(series):
+    stacked = np.zeros(0)
+    tops = [np.zeros(1)]
+    for _, _, kind, values in series:
+        if kind == 'stack':
+            stacked = values if stacked.size == 0 else stacked + values
+            tops.append(stacked)
+        else:
+            tops.append(values)
+    values = np.concatenate([np.ravel(t) for t in tops])
+    values = values[np.isfinite(values)]
+    return (values.min(), values.max()) if values.size else (0, 1)
+
+
+def _draw_series(axes, x, series):
+    parts = []
+    bottom = np.zeros(len(x))
+    for label, color, kind, values in series:
+        if kind in ('stack', 'bar'):
+            bx, top = _bucket_means(x, values)
+            base = _bucket_means(x, bottom)[1] if kind == 'stack' else np.zeros(len(bx))
+            width = axes.bar_width() * len(x) / len(bx)
+            y_top, y_base = axes.y(base + np.nan_to_num(top)), axes.y(base)
+            rects = ''.join(
+                f'<rect x="{cx - width / 2:.1f}" y="{min(a, b):.1f}" width="{width:.1f}" height="{abs(b - a):.1f}"/>'
+                for cx, a, b in zip(axes.x(bx), y_top, y_base))
+            opacity = '' if kind == 'stack' else ' fill-opacity="0.7"'
+            parts.append(f'<g fill="{color}"{opacity}><title>{html.escape(label)}</title>{rects}</g>')
+            if kind == 'stack':
+                bottom = bottom + np.nan_to_num(values)
+        else:
+            ok = np.isfinite(values)
+            lx, ly = downsample(x[ok].astype(float), values[ok])
+            points = ' '.join(f'{px:.1f},{py:.1f}' for px, py in zip(axes.x(lx), axes.y(ly)))
+            parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{points}">'
+                         f'<title>{html.escape(label)}</title></polyline>')
+    return parts
+
+
+def _y_axis(axes, side, color):
+    x = axes.left if side == 'left' else axes.right
+    anchor, dx = ('end', -6) if side == 'left' else ('start', 6)
+    parts = [f'<line x1="{x}" y1="{axes.top}" x2="{x}" y2="{axes.bottom}" stroke="#999"/>']
+    for tick in axes.ticks:
+        y = axes.y(tick)
+        if side == 'left':
+            parts.append(f'<line x1="{axes.left}" y1="{y:.1f}" x2="{axes.right}" y2="{y:.1f}" stroke="#ddd"/>')
+        parts.append(f'<text x="{x + dx}" y="{y + 4:.1f}" text-anchor="{anchor}" fill="{color}">{_fmt(tick)}</text>')
+    return parts
+
+
+def render_panel(title, years, primary, secondary=()):
+    """Fragment SVG d'un panneau ; séries = [(libellé, couleur, type, valeurs)]"""
+    x = np.asarray(years)
+    x_range = (x.min(), x.max())
+    low, high = _series_range(primary)
+    axes = _Axes(x_range, _nice_ticks(min(low, 0), high))
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+             f'font-family="sans-serif" font-size="10">',
+             f'<text x="{WIDTH / 2}" y="18" text-anchor="middle" font-size="13" font-weight="bold">'
+             f'{html.escape(title)}</text>']
+    parts += _y_axis(axes, 'left', primary[0][1] if secondary else '#333')
+    parts += _draw_series(axes, x, primary)
+    if secondary:
+        low2, high2 = _series_range(secondary)
+        axes2 = _Axes(x_range, _nice_ticks(min(low2, 0), high2))
+        parts += _y_axis(axes2, 'right', secondary[0][1])
+        parts += _draw_series(axes2, x, secondary)
+    parts.append(f'<line x1="{axes.left}" y1="{axes.y(0):.1f}" x2="{axes.right}" y2="{axes.y(0):.1f}" stroke="#666"/>')
+    step = 10 if x_range[1] - x_range[0] > 20 else 1
+    for year in range(int(np.ceil(x_range[0] / step) * step), int(x_range[1]) + 1, step):
+        parts.append(f'<text x="{axes.x(year):.1f}" y="{axes.bottom + 14}" text-anchor="middle">{year}</text>')
+    for i, (label, color, _, _) in enumerate(list(primary) + list(secondary)):
+        lx, ly = MARGIN['left'] + (i % 3) * 160, axes.bottom + 30 + (i // 3) * 12
+        parts.append(f'<rect x="{lx}" y="{ly - 8}" width="10" height="8" fill="{color}"/>'
+                     f'<text x="{lx + 14}" y="{ly}">{html.escape(label[:28])}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def render_fan(title, years, low, median, high, color):
+    """Éventail Q05-Q95 et médiane d'un indicateur sur l'ensemble des répliques"""
+    x = np.asarray(years)
+    axes = _Axes((x.min(), x.max()), _nice_ticks(min(np.nanmin(low), 0), np.nanmax(high)))
+    band = (' '.join(f'{px:.1f},{py:.1f}' for px, py in zip(axes.x(x), axes.y(high)))
+            + ' ' + ' '.join(f'{px:.1f},{py:.1f}' for px, py in zip(axes.x(x[::-1]), axes.y(low[::-1]))))
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+             f'font-family="sans-serif" font-size="10">',
+             f'<text x="{WIDTH / 2}" y="18" text-anchor="middle" font-size="13" font-weight="bold">'
+             f'{html.escape(title)}</text>']
+    parts += _y_axis(axes, 'left', '#333')
+    parts.append(f'<polygon points="{band}" fill="{color}" fill-opacity="0.2"><title>Q05-Q95</title></polygon>')
+    parts += _draw_series(axes, x, [('Médiane', color, 'line', median)])
+    step = 10 if x.max() - x.min() > 20 else 1
+    for year in range(int(np.ceil(x.min() / step) * step), int(x.max()) + 1, step):
+        parts.append(f'<text x="{axes.x(year):.1f}" y="{axes.bottom + 14}" text-anchor="middle">{year}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+class FragmentCache:
+    """Fragments SVG indexés par l'empreinte de leurs entrées (titre, séries, version du rendu)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.hits = self.misses = 0
+        self._memory = {}
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def digest(*parts):
+        sha = hashlib.sha1(str(RENDER_VERSION).encode())
+        for part in parts:
+            sha.update(np.ascontiguousarray(part).tobytes() if isinstance(part, np.ndarray) else repr(part).encode())
+        return sha.hexdigest()
+
+    def get_or_render(self, key, render):
+        filename = os.path.join(self.path, f"{key}.svg") if self.path else None
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        if filename and os.path.exists(filename):
+            self.hits += 1
+            with open(filename, encoding='utf-8') as handle:
+                fragment = handle.read()
+        else:
+            self.misses += 1
+            fragment = render()
+            if filename:
+                with open(filename + '.tmp', 'w', encoding='utf-8') as handle:
+                    handle.write(fragment)
+                os.replace(filename + '.tmp', filename)
+        self._memory[key] = fragment
+        return fragment
+
+
+def _panel_fragments(df, cache):
+    values = {column: df[column].to_numpy(dtype=float, na_value=np.nan) for column in df.columns}
+    values.update(health_metrics(values))
+    years = values['Annee']
+    fragments = []
+    for key, title, primary, secondary in PANELS:
+        if not all(spec[0] in values for spec in primary + secondary):
+            continue
+        series = [[(label, color, kind, values[column] * scale) for column, label, color, kind, scale in group]
+                  for group in (primary, secondary)]
+        digest = cache.digest(key, title, primary, secondary, years,
+                              *[values[column] for column, *_ in primary + secondary])
+        fragments.append(cache.get_or_render(digest, lambda: render_panel(title, years, *series)))
+    return fragments
+
+
+def _fan_fragments(ensemble, party, cache):
+    table = ensemble.quantiles(party, q=(0.05, 0.5, 0.95))
+    fragments = []
+    for column, title, color in FAN_COLUMNS:
+        rows = table[table['Indicateur'] == column]
+        if rows.empty:
+            continue
+        years = rows['Annee'].to_numpy()
+        low, median, high = (rows[name].to_numpy(dtype=float) for name in ('Q05', 'Q50', 'Q95'))
+        digest = cache.digest('fan', title, color, years, low, median, high)
+        fragments.append(cache.get_or_render(
+            digest, lambda: render_fan(f"{title} — {ensemble.n_replicates} répliques", years, low, median, high, color)))
+    return fragments
+
+
+def _table(headers, rows):
+    head = ''.join(f'<th>{html.escape(str(h))}</th>' for h in headers)
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+STYLE = """body{font-family:sans-serif;margin:24px;color:#222;max-width:1200px}
+h1{font-size:20px}h2{font-size:16px;margin-top:28px}
+.grille{display:grid;grid-template-columns:repeat(auto-fill,minmax(520px,1fr));gap:12px}
+.grille svg{width:100%;height:auto;background:#fafafa;border:1px solid #eee}
+table{border-collapse:collapse;font-size:13px}td,th{border:1px solid #ddd;padding:4px 8px;text-align:left}
+td:nth-child(2){text-align:right}"""
+
+
+def build_report(path, df, profile, metrics=None, metric_labels=None, ensemble=None, party=0, cache_dir=None):
+    """Écrit le rapport dans le répertoire ``path`` : index.html (SVG en ligne) et donnees.csv.gz
+
+    ``cache_dir`` conserve les fragments SVG d'un rapport à l'autre : seuls
+    les panneaux dont les données ont changé sont redessinés. Renvoie le
+    cache utilisé (compteurs ``hits`` / ``misses``).
+    """
+    os.makedirs(path, exist_ok=True)
+    cache = cache_dir if isinstance(cache_dir, FragmentCache) else FragmentCache(cache_dir)
+    fragments = _panel_fragments(df, cache)
+    fans = _fan_fragments(ensemble, party, cache) if ensemble is not None else []
+
+    sections = [f'<h1>Analyse des Finances du {html.escape(profile.parti)} '
+                f'({profile.start_year}-{profile.end_year})</h1>',
+                '<div class="grille">' + ''.join(fragments) + '</div>']
+    if fans:
+        sections += ['<h2>Incertitude des projections</h2>', '<div class="grille">' + ''.join(fans) + '</div>']
+    if metrics:
+        labels = metric_labels or {}
+        rows = [(labels.get(key, (key, ''))[0], f"{value:,.2f}".replace(',', ' '), labels.get(key, ('', ''))[1])
+                for key, value in metrics.items()]
+        sections += ['<h2>Indicateurs clés</h2>', _table(('Indicateur', 'Valeur', 'Unité'), rows)]
+    if profile.milestones:
+        sections += ['<h2>Événements marquants</h2>',
+                     _table(('Année', 'Événement'), [(year, text) for year, _, text in profile.milestones])]
+    sections.append('<p><a href="donnees.csv.gz">Données annuelles (CSV compressé)</a></p>')
+
+    document = (f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">'
+                f'<title>{html.escape(profile.parti)}</title><style>{STYLE}</style></head>'
+                f'<body>{"".join(sections)}</body></html>')
+    with open(os.path.join(path, 'index.html'), 'w', encoding='utf-8') as handle:
+        handle.write(document)
+    write_csv(df, os.path.join(path, 'donnees.csv.gz'))
+    return cache
@@ -0,0 +1,166 @@
+"""Prolongement incrémental de l'horizon : seules les nouvelles années sont simulées et ajoutées"""
+from dataclasses import replace
+import json
+import os
+import pickle
+import numpy as np
+from batch import event_factors, indicator_mean
+from calendar_index import calendar_index
+from indicator_graph import indicator_rng
+from schema import COLUMN_SCHEMA
+
+YEAR_BLOCK = 8  # années simulées à la fois lors d'une création ou d'un prolongement
+
+
+class SimulationState:
+    """Point de reprise d'une simulation : dernière année, états RNG par indicateur, stocks reportés
+
+    Les tirages suivent l'ordre année-majeur des flux de IndicatorGraph :
+    simuler 1972-2025 puis 2026 donne exactement le même résultat que
+    simuler 1972-2026 d'un coup.
+    """
+
+    def __init__(self, profile, n_replicates=1, seed=None):
+        self.profile = profile
+        self.n_replicates = n_replicates
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.last_year = profile.start_year - 1
+        self.rng_states = {}  # colonne -> état du générateur après la dernière année
+        self.stocks = {}  # colonne cumulative -> dernier stock déterministe
+
+    def advance(self, to_year):
+        """Simule les années ``last_year+1 .. to_year`` : (années, {colonne: (année, réplique)})"""
+        years = np.arange(self.last_year + 1, to_year + 1)
+        if len(years) == 0:
+            return years, {}
+        profile = replace(self.profile, end_year=max(self.profile.end_year, int(to_year)))
+        index = calendar_index(profile, years)
+
+        out = {}
+        for column, spec in profile.indicators.items():
+            mean = indicator_mean(profile, column, years, index, stock=self.stocks.get(column))
+            if spec.kind == 'cumulative':
+                self.stocks[column] = float(mean[-1])
+            mean = mean * event_factors(profile, column, years)
+
+            if spec.sigma:
+                rng = indicator_rng(self.seed, column)
+                if column in self.rng_states:
+                    rng.bit_generator.state = self.rng_states[column]
+                values = mean[:, None] * rng.normal(1, spec.sigma, size=(len(years), self.n_replicates))
+                self.rng_states[column] = rng.bit_generator.state
+            else:
+                values = np.repeat(mean[:, None].astype(float), self.n_replicates, axis=1)
+
+            for year, override_column, value in profile.overrides:
+                if override_column == column:
+                    values[years == year] = value
+            out[column] = values
+
+        self.last_year = int(to_year)
+        self.profile = profile
+        return years, out
+
+
+class EnsembleStore:
+    """Ensemble de répliques sur disque, un fichier binaire (année, réplique) par colonne
+
+    Les années sont contiguës dans chaque fichier : prolonger l'horizon ajoute
+    des lignes en fin de fichier sans relire ni réécrire l'historique.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as handle:
+            self.manifest = json.load(handle)
+        # Les stockages antérieurs n'ont qu'un state.pkl, sans référence dans le manifeste
+        with open(os.path.join(path, self.manifest.get('state', 'state.pkl')), 'rb') as handle:
+            self.state = pickle.load(handle)
+        if self.state.last_year != self.manifest['end_year']:
+            raise ValueError(f"État de reprise incohérent avec le manifeste dans {path}")
+
+    @classmethod
+    def create(cls, path, profile, n_replicates, seed=None, end_year=None):
+        """Crée le stockage et simule jusqu'à ``end_year`` (par défaut celle du profil)"""
+        os.makedirs(path, exist_ok=True)
+        # Index de requêtes d'un éventuel ensemble précédent (voir query)
+        if os.path.exists(os.path.join(path, 'zones.npz')):
+            os.remove(os.path.join(path, 'zones.npz'))
+        state = SimulationState(profile, n_replicates, seed)
+        manifest = {
+            'parti': profile.parti,
+            'seed': int(state.seed),
+            'n_replicates': int(n_replicates),
+            'start_year': int(profile.start_year),
+            'end_year': int(profile.start_year) - 1,
+            'columns': {column: COLUMN_SCHEMA.get(column, ('float64',))[0] for column in profile.indicators},
+        }
+        for column in manifest['columns']:
+            open(cls._column_file(path, column), 'wb').close()
+        cls._save(path, manifest, state)
+        store = cls(path)
+        store.extend(end_year if end_year is not None else profile.end_year)
+        return store
+
+    @staticmethod
+    def _column_file(path, column):
+        return os.path.join(path, f"{column}.bin")
+
+    @staticmethod
+    def _save(path, manifest, state):
+        """Enregistre l'état sous un nom propre à sa dernière année, puis le manifeste qui le désigne
+
+        Seul le remplacement du manifeste publie la paire : une interruption
+        avant lui laisse l'ancien manifeste et l'ancien état, toujours cohérents.
+        """
+        state_name = f"state-{state.last_year}.pkl"
+        manifest_file = os.path.join(path, 'manifest.json')
+        with open(os.path.join(path, state_name + '.tmp'), 'wb') as handle:
+            pickle.dump(state, handle)
+        os.replace(os.path.join(path, state_name + '.tmp'), os.path.join(path, state_name))
+        manifest['state'] = state_name
+        with open(manifest_file + '.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, ensure_ascii=False, indent=1)
+        os.replace(manifest_file + '.tmp', manifest_file)
+        for name in os.listdir(path):
+            if name != state_name and name.startswith('state') and name.endswith('.pkl'):
+                os.remove(os.path.join(path, name))
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def years(self):
+        return np.arange(self.manifest['start_year'], self.manifest['end_year'] + 1)
+
+    def extend(self, to_year):
+        """Simule et ajoute uniquement les années après la dernière année stockée"""
+        self._truncate_partial_writes()
+        while self.state.last_year < to_year:
+            block_end = min(to_year, self.state.last_year + YEAR_BLOCK)
+            _, values = self.state.advance(block_end)
+            for column, dtype in self.manifest['columns'].items():
+                block = values[column]
+                if np.dtype(dtype).kind == 'i':
+                    block = np.rint(block)
+                with open(self._column_file(self.path, column), 'ab') as handle:
+                    block.astype(dtype).tofile(handle)
+            self.manifest['end_year'] = int(block_end)
+            # Le manifeste n'avance qu'une fois les données écrites
+            self._save(self.path, self.manifest, self.state)
+        return self
+
+    def _truncate_partial_writes(self):
+        """Écarte les lignes écrites après la dernière sauvegarde du manifeste (écriture interrompue)"""
+        for column, dtype in self.manifest['columns'].items():
+            size = len(self.years) * self.manifest['n_replicates'] * np.dtype(dtype).itemsize
+            filename = self._column_file(self.path, column)
+            if os.path.getsize(filename) > size:
+                os.truncate(filename, size)
+
+    def read(self, column):
+        """Vue mémoire (année, réplique) d'une colonne, sans chargement complet"""
+        shape = (len(self.years), self.manifest['n_replicates'])
+        return np.memmap(self._column_file(self.path, column), dtype=self.manifest['columns'][column],
+                         mode='r', shape=shape)
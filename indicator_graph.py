@@ -0,0 +1,97 @@
+"""Graphe de dépendances des indicateurs : évaluation paresseuse et mémoïsée des seules colonnes demandées"""
+import zlib
+import numpy as np
+from batch import event_factors, indicator_mean
+from calendar_index import calendar_index
+
+
+def indicator_rng(seed, column):
+    """Flux aléatoire propre à un indicateur : indépendant des autres colonnes calculées"""
+    return np.random.default_rng([seed, zlib.crc32(column.encode())])
+
+
+class IndicatorGraph:
+    """Indicateurs d'un profil enregistrés comme nœuds avec dépendances déclarées
+
+    Chaque nœud est une fonction ``func(graph, *dependances)`` renvoyant un
+    tableau (réplique, année). ``compute(noms)`` n'évalue que le sous-graphe
+    nécessaire et mémorise chaque nœud calculé.
+    """
+
+    def __init__(self, profile, n_replicates=1, seed=None, years=None):
+        self.profile = profile
+        self.n_replicates = n_replicates
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.years = np.asarray(years if years is not None else profile.years)
+        self._nodes = {}
+        self._cache = {}
+
+        self.register('Annee', lambda graph: graph.years)
+        self.register('_calendrier', lambda graph: calendar_index(graph.profile, graph.years))
+        for column in profile.indicators:
+            self.register(column, _simulate_node(column), deps=('_calendrier',))
+
+    def register(self, name, func, deps=()):
+        """Enregistre (ou remplace) un nœud ; invalide les valeurs mémorisées qui en dépendent"""
+        for cached in [node for node in self._cache if name in self._closure(node, strict=False)]:
+            del self._cache[cached]
+        self._nodes[name] = (func, tuple(deps))
+
+    @property
+    def nodes(self):
+        return list(self._nodes)
+
+    def dependencies(self, name):
+        return self._nodes[name][1]
+
+    def _closure(self, name, strict=True, _stack=()):
+        """Nœuds nécessaires à ``name`` (lui compris), dans un ordre d'évaluation valide"""
+        if name not in self._nodes:
+            if strict:
+                raise KeyError(f"Indicateur inconnu: {name}")
+            return [name]
+        if name in _stack:
+            raise ValueError(f"Dépendance circulaire: {' -> '.join(_stack + (name,))}")
+        order = []
+        for dep in self._nodes[name][1]:
+            for node in self._closure(dep, strict, _stack + (name,)):
+                if node not in order:
+                    order.append(node)
+        order.append(name)
+        return order
+
+    def plan(self, names):
+        """Ordre d'évaluation du sous-graphe requis pour ``names``"""
+        order = []
+        for name in names:
+            for node in self._closure(name):
+                if node not in order:
+                    order.append(node)
+        return order
+
+    def compute(self, names):
+        """Évalue paresseusement les nœuds demandés : {nom: valeur}"""
+        for node in self.plan(names):
+            if node not in self._cache:
+                func, deps = self._nodes[node]
+                self._cache[node] = func(self, *(self._cache[dep] for dep in deps))
+        return {name: self._cache[name] for name in names}
+
+
+def _simulate_node(column):
+    def simulate(graph, index):
+        profile, years = graph.profile, graph.years
+        spec = profile.indicators[column]
+        values = indicator_mean(profile, column, years, index) * event_factors(profile, column, years)
+        values = np.broadcast_to(values, (graph.n_replicates, len(years)))
+        if spec.sigma:
+            # Tirage année par année (ordre année-majeur) pour pouvoir prolonger l'horizon
+            noise = indicator_rng(graph.seed, column).normal(1, spec.sigma, size=(len(years), graph.n_replicates))
+            values = values * noise.T
+        else:
+            values = values.astype(float)
+        for year, override_column, value in profile.overrides:
+            if override_column == column:
+                values[:, years == year] = value
+        return values
+    return simulate
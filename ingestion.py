@@ -0,0 +1,261 @@
+"""Chargement de comptes annuels réels (CSV/XLSX/XLS) et fusion avec les séries simulées"""
+import hashlib
+import json
+import os
+import unicodedata
+import numpy as np
+import pandas as pd
+from batch import BatchResult
+from schema import COLUMN_SCHEMA, apply_schema
+
+# Libellés usuels des exports comptables -> colonnes du schéma
+COLUMN_ALIASES = {
+    'annee': 'Annee', 'exercice': 'Annee', 'year': 'Annee',
+    'nombre_adherents': 'Adherents', 'adherents': 'Adherents',
+    'total_produits': 'Revenus_Total', 'total_des_produits': 'Revenus_Total',
+    'produits': 'Revenus_Total', 'recettes': 'Revenus_Total',
+    'total_charges': 'Depenses_Total', 'total_des_charges': 'Depenses_Total',
+    'charges': 'Depenses_Total', 'depenses': 'Depenses_Total',
+    'cotisations': 'Cotisations_Adherents',
+    'dons': 'Dons_Petits', 'dons_personnes_physiques': 'Dons_Petits',
+    'aide_publique': 'Financement_Public', 'financement_public': 'Financement_Public',
+    'emprunts': 'Emprunts', 'dettes_financieres': 'Endettement', 'endettement': 'Endettement',
+    'charges_de_personnel': 'Depenses_Personnel', 'frais_de_personnel': 'Depenses_Personnel',
+    # Résultat de l'exercice (montant) : converti en Solde_Financier (part des revenus)
+    'resultat': 'Resultat', 'resultat_de_l_exercice': 'Resultat',
+}
+
+CSV_CHUNKSIZE = 50_000
+
+# Unités des montants d'un export -> facteur vers les M€ des séries simulées
+UNITS = {'€': 1e-6, 'k€': 1e-3, 'M€': 1.0}
+AMOUNT_COLUMNS = [column for column, (dtype, _, upper) in COLUMN_SCHEMA.items()
+                  if dtype == 'float32' and upper is None]
+
+
+def _normalize_label(label):
+    """'Total des Produits' -> 'total_des_produits' (sans accents)"""
+    text = unicodedata.normalize('NFKD', str(label)).encode('ascii', 'ignore').decode()
+    return '_'.join(text.lower().replace("'", ' ').replace('-', ' ').split())
+
+
+_SCHEMA_LABELS = {_normalize_label(column): column for column in COLUMN_SCHEMA}
+
+
+def map_column(label, column_map=None):
+    """Colonne du schéma correspondant à un libellé d'export (None si inconnue)"""
+    if column_map and label in column_map:
+        return column_map[label]
+    key = _normalize_label(label)
+    return _SCHEMA_LABELS.get(key) or COLUMN_ALIASES.get(key)
+
+
+def _file_signature(path, column_map=None, read_kwargs=None, unit=None):
+    stat = os.stat(path)
+    # Les options de lecture, de correspondance et l'unité changent le résultat converti
+    options = repr((sorted((column_map or {}).items()), sorted((read_kwargs or {}).items()), unit))
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{options}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _to_numeric(series):
+    """Convertit les montants au format français ('1 234,5', '12%') en nombres"""
+    if series.dtype.kind in 'iufb':
+        return series
+    text = (series.astype(str)
+            .str.replace(' ', '', regex=False)
+            .str.replace(' ', '', regex=False)
+            .str.replace('€', '', regex=False)
+            .str.replace('%', '', regex=False)
+            .str.replace(',', '.', regex=False))
+    return pd.to_numeric(text, errors='coerce')
+
+
+def _is_year(label):
+    try:
+        return 1900 <= int(float(str(label).strip())) <= 2200
+    except ValueError:
+        return False
+
+
+def _normalize_frame(raw, column_map=None):
+    """Ramène un bloc brut (format long ou large) aux colonnes du schéma"""
+    labels = list(raw.columns)
+    if sum(_is_year(label) for label in labels[1:]) >= max(1, (len(labels) - 1) // 2):
+        # Format large : une ligne par poste, une colonne par exercice
+        raw = raw.set_index(labels[0])
+        raw = raw[[label for label in raw.columns if _is_year(label)]].T
+        raw.index = [int(float(str(label))) for label in raw.index]
+        raw = raw.rename_axis('Annee').reset_index()
+
+    frame = {}
+    for label in raw.columns:
+        column = map_column(label, column_map)
+        if column is not None and column not in frame:
+            frame[column] = _to_numeric(raw[label])
+    if 'Annee' not in frame:
+        raise ValueError("Aucune colonne d'année reconnue dans le fichier")
+    frame = pd.DataFrame(frame)
+    return frame[frame['Annee'].notna()]
+
+
+class DtypeCache:
+    """Cache des colonnes texte par structure d'en-tête (fichier JSON)
+
+    Seul le choix sûr est mémorisé : lire en texte les colonnes qui l'étaient.
+    Les dtypes numériques restent inférés à chaque fichier, un autre export de
+    même en-tête pouvant contenir des montants formatés ('50 000').
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                self._entries = json.load(handle)
+
+    @staticmethod
+    def key(header):
+        return hashlib.sha1('\x1f'.join(map(str, header)).encode()).hexdigest()[:16]
+
+    def get(self, header):
+        dtypes = self._entries.get(self.key(header))
+        if dtypes is None:
+            return None
+        return {label: dtype for label, dtype in dtypes.items() if dtype == 'str'}
+
+    def put(self, header, dtypes):
+        self._entries[self.key(header)] = {label: 'str' for label, dtype in dtypes.items()
+                                           if dtype in ('object', 'str')}
+        with open(self.path, 'w', encoding='utf-8') as handle:
+            json.dump(self._entries, handle)
+
+
+def _read_csv_chunks(path, dtype_cache, chunksize, **read_kwargs):
+    read_kwargs.setdefault('sep', None)  # détection automatique ';' / ','
+    read_kwargs.setdefault('engine', 'python' if read_kwargs['sep'] is None else 'c')
+    header = list(pd.read_csv(path, nrows=0, **read_kwargs).columns)
+    dtypes = dtype_cache.get(header) if dtype_cache is not None else None
+    reader = pd.read_csv(path, chunksize=chunksize, dtype=dtypes, **read_kwargs)
+    for i, chunk in enumerate(reader):
+        if i == 0 and dtype_cache is not None and dtypes is None:
+            dtype_cache.put(header, {label: str(dtype) for label, dtype in chunk.dtypes.items()})
+        yield chunk
+
+
+def _read_xlsx_chunks(path, chunksize, sheet_name=None):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows)
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) >= chunksize:
+                yield pd.DataFrame(block, columns=header)
+                block = []
+        if block:
+            yield pd.DataFrame(block, columns=header)
+    finally:
+        workbook.close()
+
+
+def _convert_amounts(frame, unit):
+    """Montants ramenés en M€ ; le résultat de l'exercice devient un solde rapporté aux revenus"""
+    if unit not in UNITS:
+        raise ValueError(f"Unité inconnue: {unit} (attendu: {', '.join(UNITS)})")
+    if 'Resultat' in frame:
+        if 'Revenus_Total' in frame:
+            ratio = frame['Resultat'] / frame['Revenus_Total'].where(frame['Revenus_Total'] > 0)
+            frame['Solde_Financier'] = (frame['Solde_Financier'].fillna(ratio)
+                                        if 'Solde_Financier' in frame else ratio)
+        frame = frame.drop(columns='Resultat')
+    for column in AMOUNT_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column] * UNITS[unit]
+    return frame
+
+
+def load_filing(path, column_map=None, cache_dir=None, chunksize=CSV_CHUNKSIZE, unit='€', **read_kwargs):
+    """Charge un export de comptes (CSV, XLSX ou XLS) au format de generate_financial_data
+
+    Les montants sont exprimés en ``unit`` ('€', 'k€' ou 'M€') dans le fichier
+    et convertis en M€. Avec ``cache_dir``, le résultat converti est conservé
+    (clé : chemin, taille et date de modification, options de lecture) et
+    relu directement aux appels suivants ; les colonnes texte des CSV sont
+    mémorisées par structure d'en-tête.
+    """
+    cached = dtype_cache = None
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached = os.path.join(cache_dir, f"{_file_signature(path, column_map, read_kwargs, unit)}.pkl")
+        if os.path.exists(cached):
+            return pd.read_pickle(cached)
+        dtype_cache = DtypeCache(os.path.join(cache_dir, 'dtypes.json'))
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = _read_xlsx_chunks(path, chunksize, read_kwargs.get('sheet_name'))
+    elif extension == '.xls':
+        chunks = [pd.read_excel(path, engine='xlrd', **read_kwargs)]
+    else:
+        chunks = _read_csv_chunks(path, dtype_cache, chunksize, **read_kwargs)
+
+    frame = pd.concat([_normalize_frame(chunk, column_map) for chunk in chunks], ignore_index=True)
+    # Au format large, les postes d'un même exercice peuvent venir de blocs différents
+    frame = frame.groupby('Annee', sort=True).last().reset_index()
+    frame = apply_schema(_convert_amounts(frame, unit))
+
+    if cached is not None:
+        frame.to_pickle(cached)
+    return frame
+
+
+def load_filings(paths, column_map=None, cache_dir=None, unit='€', **read_kwargs):
+    """Charge plusieurs exports ; pour une même année, le dernier fichier l'emporte"""
+    frames = [load_filing(path, column_map, cache_dir, unit=unit, **read_kwargs) for path in paths]
+    frame = pd.concat(frames, ignore_index=True)
+    # Un même exercice peut être renseigné partiellement dans plusieurs fichiers
+    frame = frame.groupby('Annee', sort=True).last().reset_index()
+    return apply_schema(frame)
+
+
+def merge_observed(simulated, observed, party=0):
+    """Remplace les valeurs simulées par les valeurs observées (années et colonnes communes)
+
+    ``simulated`` est un DataFrame de generate_financial_data ou un BatchResult ;
+    dans ce cas les observations s'appliquent à toutes les répliques du parti.
+    """
+    obs_years = observed['Annee'].to_numpy()
+    columns = [column for column in observed.columns if column != 'Annee']
+
+    if isinstance(simulated, BatchResult):
+        p = party if isinstance(party, int) else simulated.parties.index(party)
+        pos = np.searchsorted(simulated.years, obs_years)
+        valid = (pos < len(simulated.years)) & (simulated.years[np.minimum(pos, len(simulated.years) - 1)] == obs_years)
+        data = dict(simulated.data)
+        for column in columns:
+            if column not in data:
+                continue
+            values = observed[column].to_numpy(dtype=float, na_value=np.nan)
+            hit = valid & ~np.isnan(values)
+            merged = data[column].copy()
+            merged[p, :, pos[hit]] = values[hit][:, None]
+            data[column] = merged
+        return BatchResult(simulated.parties, simulated.years, simulated.mask, data)
+
+    merged = simulated.copy()
+    sim_years = merged['Annee'].to_numpy()
+    pos = pd.Index(obs_years).get_indexer(sim_years)
+    found = pos >= 0
+    for column in columns:
+        if column not in merged:
+            continue
+        values = observed[column].to_numpy(dtype=float, na_value=np.nan)
+        taken = np.full(len(sim_years), np.nan)
+        taken[found] = values[pos[found]]
+        merged[column] = np.where(np.isnan(taken), merged[column].to_numpy(dtype=float, na_value=np.nan), taken)
+    return apply_schema(merged)
@@ -0,0 +1,161 @@
+"""Noyaux des récurrences séquentielles (bruit AR(1), stocks composés, régimes markoviens)
+
+Compilés avec Numba et parallélisés sur les séries lorsque Numba est
+installé ; sinon, implémentation NumPy aux résultats identiques (mêmes
+opérations flottantes, dans le même ordre). ``FN_RN_NO_JIT=1`` force NumPy.
+"""
+import os
+import time
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # dépendance optionnelle
+    numba = None
+
+USE_JIT = numba is not None and os.environ.get('FN_RN_NO_JIT') != '1'
+SERIES_BLOCK = 1024  # séries par bloc parallèle (noyaux Numba à tableaux année-majeurs)
+
+
+# Implémentations NumPy : boucle sur les années, vectorisée sur les séries
+
+def _ar1_numpy(z, phi, scale):
+    out = np.empty_like(z)
+    out[0] = z[0]
+    for t in range(1, len(z)):
+        out[t] = phi * out[t - 1] + scale * z[t]
+    return out
+
+
+def _compound_numpy(steps):
+    return np.multiply.accumulate(steps, axis=1)
+
+
+def _markov_numpy(uniforms, enter, leave):
+    states = np.empty(uniforms.shape, dtype=np.bool_)
+    crisis = np.zeros(uniforms.shape[1], dtype=np.bool_)
+    for t in range(len(uniforms)):
+        crisis = np.where(crisis, uniforms[t] >= leave, uniforms[t] < enter)
+        states[t] = crisis
+    return states
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _ar1_jit(z, phi, scale):
+        n_years, n_series = z.shape
+        out = np.empty_like(z)
+        # Une seule région parallèle sur des blocs de séries ; dans chaque bloc,
+        # boucle séquentielle sur les années avec l'état courant en local
+        for b in numba.prange((n_series + SERIES_BLOCK - 1) // SERIES_BLOCK):
+            lo = b * SERIES_BLOCK
+            hi = min(lo + SERIES_BLOCK, n_series)
+            prev = z[0, lo:hi].copy()
+            out[0, lo:hi] = prev
+            phi_b, scale_b = phi[lo:hi], scale[lo:hi]
+            for t in range(1, n_years):
+                z_t, out_t = z[t, lo:hi], out[t, lo:hi]
+                for k in range(hi - lo):
+                    prev[k] = phi_b[k] * prev[k] + scale_b[k] * z_t[k]
+                    out_t[k] = prev[k]
+        return out
+
+    @numba.njit(parallel=True, cache=True)
+    def _compound_jit(steps):
+        n_series, n_years = steps.shape
+        out = np.empty_like(steps)
+        for i in numba.prange(n_series):
+            acc = steps[i, 0]
+            out[i, 0] = acc
+            for t in range(1, n_years):
+                acc = acc * steps[i, t]
+                out[i, t] = acc
+        return out
+
+    @numba.njit(parallel=True, cache=True)
+    def _markov_jit(uniforms, enter, leave):
+        n_years, n_series = uniforms.shape
+        states = np.empty((n_years, n_series), dtype=np.bool_)
+        for b in numba.prange((n_series + SERIES_BLOCK - 1) // SERIES_BLOCK):
+            lo = b * SERIES_BLOCK
+            hi = min(lo + SERIES_BLOCK, n_series)
+            crisis = np.zeros(hi - lo, dtype=np.bool_)
+            for t in range(n_years):
+                u_t, states_t = uniforms[t, lo:hi], states[t, lo:hi]
+                for k in range(hi - lo):
+                    crisis[k] = u_t[k] >= leave if crisis[k] else u_t[k] < enter
+                    states_t[k] = crisis[k]
+        return states
+
+
+def ar1_filter(innovations, phi, jit=None):
+    """Filtre AR(1) stationnaire le long du premier axe (années)
+
+    ``e[0] = z[0]`` puis ``e[t] = phi * e[t-1] + sqrt(1 - phi²) * z[t]`` :
+    la variance marginale et les corrélations instantanées sont conservées.
+    ``phi`` est un scalaire ou un tableau diffusable sur ``innovations.shape[1:]``.
+    """
+    z = np.ascontiguousarray(innovations, dtype=float)
+    shape = z.shape
+    z = z.reshape(shape[0], -1)
+    phi = np.ascontiguousarray(np.broadcast_to(np.asarray(phi, dtype=float), shape[1:])).reshape(-1)
+    scale = np.sqrt(1 - phi ** 2)
+    kernel = _ar1_jit if (USE_JIT if jit is None else jit) else _ar1_numpy
+    return kernel(z, phi, scale).reshape(shape)
+
+
+def compound(steps, jit=None):
+    """Produit cumulé le long du dernier axe (années) : stocks composés année après année"""
+    steps = np.ascontiguousarray(steps, dtype=float)
+    shape = steps.shape
+    kernel = _compound_jit if (USE_JIT if jit is None else jit) else _compound_numpy
+    return kernel(steps.reshape(-1, shape[-1])).reshape(shape)
+
+
+def markov_states(uniforms, enter, leave, jit=None):
+    """États d'un régime à deux états (année, série) à partir de tirages uniformes (année, série)
+
+    Départ hors crise ; entrée si ``u < enter``, sortie si ``u < leave``
+    (probabilités annuelles ``enter`` et ``leave``, cf. ``ShockSpec.rate`` et
+    ``ShockSpec.exit_rate``) : la crise se prolonge tant que ``u >= leave``.
+    """
+    uniforms = np.ascontiguousarray(uniforms, dtype=float)
+    kernel = _markov_jit if (USE_JIT if jit is None else jit) else _markov_numpy
+    return kernel(uniforms, float(enter), float(leave))
+
+
+def benchmark(n_years=80, n_series=1_000_000, repeat=3, seed=0):
+    """Compare NumPy et Numba sur chaque noyau : {noyau: (s NumPy, s Numba, identiques)}"""
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((n_years, n_series))
+    phi = rng.uniform(-0.9, 0.9, n_series)
+    steps = 1 + 0.1 * rng.standard_normal((n_series, n_years))
+    uniforms = rng.random((n_years, n_series))
+    cases = {
+        'ar1_filter': lambda jit: ar1_filter(z, phi, jit=jit),
+        'compound': lambda jit: compound(steps, jit=jit),
+        'markov_states': lambda jit: markov_states(uniforms, 0.08, 0.4, jit=jit),
+    }
+    results = {}
+    for name, run in cases.items():
+        timings = {}
+        outputs = {}
+        for jit in ((False, True) if numba is not None else (False,)):
+            outputs[jit] = run(jit)  # premier appel : compilation Numba
+            start = time.perf_counter()
+            for _ in range(repeat):
+                run(jit)
+            timings[jit] = (time.perf_counter() - start) / repeat
+        same = np.array_equal(outputs[False], outputs[True]) if True in outputs else None
+        results[name] = (timings[False], timings.get(True), same)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"⚙️ Numba: {numba.__version__ if numba is not None else 'non installé'}")
+    for name, (numpy_time, jit_time, same) in benchmark().items():
+        if jit_time is None:
+            print(f"{name}: NumPy {numpy_time * 1000:.1f} ms")
+        else:
+            print(f"{name}: NumPy {numpy_time * 1000:.1f} ms, Numba {jit_time * 1000:.1f} ms "
+                  f"(x{numpy_time / jit_time:.1f}), résultats identiques: {same}")
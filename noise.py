@@ -0,0 +1,59 @@
+"""Bruit multivarié corrélé entre indicateurs, avec persistance AR(1) optionnelle"""
+import numpy as np
+from kernels import ar1_filter
+
+
+def correlation_matrix(columns, pairs):
+    """Matrice de corrélation (K, K) à partir de paires ((colonne_a, colonne_b, rho), ...)"""
+    position = {column: k for k, column in enumerate(columns)}
+    matrix = np.eye(len(columns))
+    for column_a, column_b, rho in pairs:
+        if column_a in position and column_b in position:
+            i, j = position[column_a], position[column_b]
+            matrix[i, j] = matrix[j, i] = rho
+    return matrix
+
+
+class CorrelatedNoise:
+    """Bruit multiplicatif ``1 + sigma * e`` corrélé entre K indicateurs, pour P partis
+
+    Les facteurs de Cholesky des P matrices de corrélation sont calculés en un
+    appel groupé ; un tirage couvre toutes les années, répliques et colonnes
+    avec un seul produit matriciel.
+    """
+
+    def __init__(self, columns, sigmas, correlations, persistence=0.0):
+        self.columns = list(columns)
+        self.sigmas = np.atleast_2d(np.asarray(sigmas, dtype=float))  # (P, K)
+        correlations = np.asarray(correlations, dtype=float)
+        if correlations.ndim == 2:
+            correlations = np.broadcast_to(correlations, (len(self.sigmas),) + correlations.shape)
+        try:
+            self.factors = np.linalg.cholesky(correlations)  # (P, K, K)
+        except np.linalg.LinAlgError:
+            raise ValueError("Matrice de corrélation non définie positive") from None
+        self.persistence = np.broadcast_to(np.asarray(persistence, dtype=float), self.sigmas.shape)
+        if np.any(np.abs(self.persistence) >= 1):
+            raise ValueError("La persistance AR(1) doit être dans ]-1, 1[")
+
+    @classmethod
+    def from_profiles(cls, profiles, columns):
+        """Bruit des colonnes ``columns`` selon les sigmas, corrélations et persistance de chaque profil"""
+        sigmas = [[profile.indicators[column].sigma for column in columns] for profile in profiles]
+        correlations = [correlation_matrix(columns, profile.correlations) for profile in profiles]
+        persistence = [[profile.persistence] * len(columns) for profile in profiles]
+        return cls(columns, sigmas, correlations, persistence)
+
+    def draw(self, rng, n_replicates, n_years):
+        """Multiplicateurs de bruit (colonne, parti, réplique, année)
+
+        Les innovations sont tirées année par année (ordre année-majeur),
+        comme les flux par indicateur de IndicatorGraph.
+        """
+        n_parties, n_columns = self.sigmas.shape
+        z = rng.standard_normal((n_years, n_parties, n_replicates, n_columns))
+        e = z @ np.swapaxes(self.factors, -1, -2)  # (année, parti, réplique, colonne)
+        if self.persistence.any():
+            e = ar1_filter(e, self.persistence[:, None, :])
+        noise = 1 + e * self.sigmas[:, None, :]
+        return np.moveaxis(noise, (3, 0), (0, 3))  # (colonne, parti, réplique, année)
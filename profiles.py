@@ -0,0 +1,265 @@
+"""Profils de partis : configuration, régimes de croissance, calendriers et événements"""
+from dataclasses import dataclass, field, replace
+from shocks import ShockSpec
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """Paramètres de simulation d'un indicateur annuel
+
+    Les régimes sont des tuples ``((annee_fin, valeur), ...)`` triés par année,
+    ``annee_fin=None`` désignant la dernière période. Le modèle ``trend`` vaut
+    ``base * (1 + taux * t / diviseur) * niveau * calendrier * bruit``.
+    """
+    base: float = 1.0
+    base_key: str = "budget_base"  # clé de config multipliée par base (None = absolu)
+    rate: tuple = ((None, 0.0),)
+    divisor: float = 1.0
+    origin: int = None  # année de départ de la croissance (None = début du parti)
+    level: tuple = ((None, 1.0),)
+    calendar: tuple = ()  # ((nom_calendrier, valeur ou régime), ...) : premier qui s'applique
+    calendar_default: float = 1.0
+    sigma: float = 0.0
+    kind: str = "trend"  # 'trend', 'cumulative' (stock composé) ou 'lookup' (valeurs par année)
+    lookup: tuple = ()  # ((annee, valeur), ...) pour kind='lookup'
+
+
+@dataclass(frozen=True)
+class PartyProfile:
+    """Description complète d'un parti pour la simulation"""
+    parti: str
+    start_year: int
+    end_year: int
+    creation_year: int
+    renommage_year: int = None
+    country: str = "FR"  # calendriers électoraux nationaux (voir calendar_index)
+    config: dict = field(default_factory=dict)
+    indicators: dict = field(default_factory=dict)
+    calendar: dict = field(default_factory=dict)
+    events: tuple = ()  # ((annee, colonne, facteur), ...)
+    overrides: tuple = ()  # ((annee, colonne, valeur), ...)
+    milestones: tuple = ()  # ((annee, libelle_court, libelle_long), ...)
+    correlations: tuple = ()  # ((colonne_a, colonne_b, rho), ...) corrélation des bruits (voir noise)
+    persistence: float = 0.0  # coefficient AR(1) du bruit d'une année sur l'autre
+    shocks: tuple = ()  # (ShockSpec, ...) chocs aléatoires (voir shocks)
+
+    @property
+    def years(self):
+        return range(self.start_year, self.end_year + 1)
+
+    def with_indicator(self, column, **changes):
+        """Retourne une copie du profil avec un indicateur modifié"""
+        indicators = dict(self.indicators)
+        indicators[column] = replace(indicators[column], **changes)
+        return replace(self, indicators=indicators)
+
+
+# Calendriers propres au FN/RN (les calendriers électoraux nationaux sont dans calendar_index)
+FN_RN_CALENDAR = {
+    "candidatures_presidentielles": (1974, 1988, 1995, 2002, 2007, 2012, 2017, 2022),  # Pas de candidat en 1981
+    "redressement": (1975, 1989, 1996, 2003, 2008, 2013, 2018, 2023),
+    "besoins_emprunt": (1972, 1984, 1990, 1998, 2005, 2011, 2014, 2020),
+    "hausse_dette": (1974, 1984, 1990, 1998, 2005, 2011, 2014, 2020),
+    "baisse_dette": (1980, 1992, 2000, 2008, 2016, 2022),
+    "proces": (1990, 1998, 2004, 2011, 2015, 2018),
+    "prets_etrangers": (2014, 2015, 2016, 2017),
+}
+
+FN_RN_INDICATORS = {
+    # Données d'adhérents et structure
+    "Adherents": IndicatorSpec(
+        base_key="adherents_base", divisor=4, sigma=0.10,
+        rate=((1980, 0.05),   # Débuts difficiles
+              (1987, 0.15),   # Percée électorale
+              (1994, 0.08),   # Consolidation
+              (2001, 0.12),   # Présidentielle 1995, 2002
+              (2006, 0.20),   # Après 2002
+              (2010, 0.06),   # Période intermédiaire
+              (2016, 0.25),   # Marine Le Pen
+              (2021, 0.10),   # Après 2017
+              (None, 0.08))),
+    "Federations_Departementales": IndicatorSpec(
+        base=20, base_key=None, divisor=5,
+        rate=((1980, 0.08), (2000, 0.12), (2010, 0.06), (None, 0.10))),
+    "Elus_Locaux": IndicatorSpec(
+        base=100, base_key=None, divisor=6, sigma=0.15,
+        rate=((1990, 0.15), (2010, 0.20), (None, 0.25)),
+        calendar=(("municipales", ((1995, 1.3), (2010, 1.8), (None, 2.2))),)),
+    "Elus_Nationaux": IndicatorSpec(
+        kind="lookup", calendar_default=0,
+        lookup=((1986, 35),  # Proportionnelle
+                (1988, 1), (1997, 1), (2012, 2), (2017, 8), (2022, 89)),
+        calendar=(("europeennes", 3),)),
+    "Score_Presidentielles": IndicatorSpec(
+        kind="lookup", calendar_default=0,
+        lookup=((1974, 0.5), (1981, 0.0), (1988, 14.4), (1995, 15.0), (2002, 16.9),
+                (2007, 10.4), (2012, 17.9), (2017, 21.3), (2022, 41.5))),
+
+    # Revenus du parti
+    "Revenus_Total": IndicatorSpec(
+        divisor=4, sigma=0.12,
+        rate=((1980, 0.08), (1987, 0.20), (1994, 0.12), (2001, 0.15), (2006, 0.25),
+              (2010, 0.10), (2016, 0.30), (2021, 0.18), (None, 0.22))),
+    "Cotisations_Adherents": IndicatorSpec(
+        base=0.20, divisor=5, sigma=0.10,
+        rate=((1990, 0.10), (2010, 0.15), (None, 0.20))),
+    "Dons_Petits": IndicatorSpec(
+        base=0.35, rate=((None, 0.08),), divisor=3, sigma=0.18,
+        level=((1990, 0.8), (2010, 1.2), (None, 1.5)),  # Importance croissante des petits dons
+        calendar=(("candidatures_presidentielles", 2.0),)),
+    "Dons_Grands": IndicatorSpec(
+        base=0.05, rate=((None, 0.03),), divisor=4, sigma=0.25,
+        level=((2000, 0.3), (2010, 0.5), (None, 0.7))),
+    "Financement_Public": IndicatorSpec(
+        base=0.25, rate=((None, 0.05),), divisor=4, sigma=0.15,
+        level=((1985, 0.1), (2000, 0.4), (2010, 0.6), (2020, 0.8), (None, 1.2))),
+    "Revenus_Evenements": IndicatorSpec(
+        base=0.08, rate=((None, 0.06),), divisor=10, origin=1990, sigma=0.14),
+    "Emprunts": IndicatorSpec(
+        base=0.15, rate=((None, 0.04),), divisor=4, sigma=0.30,
+        calendar=(("besoins_emprunt", 3.0),)),
+    "Aides_Etrangeres": IndicatorSpec(
+        base=0.02, rate=((None, 0.01),), divisor=4, sigma=0.40,
+        calendar=(("prets_etrangers", 2.5),), calendar_default=0.5),
+
+    # Dépenses du parti
+    "Depenses_Total": IndicatorSpec(
+        base=0.90, rate=((None, 0.06),), divisor=3, sigma=0.12,
+        calendar=(("candidatures_presidentielles", 1.6),)),
+    "Depenses_Personnel": IndicatorSpec(
+        base=0.25, divisor=4, sigma=0.08,
+        rate=((2000, 0.08), (None, 0.12))),
+    "Depenses_Campagnes": IndicatorSpec(
+        base=0.30, rate=((None, 0.07),), divisor=3, sigma=0.28,
+        calendar=(("candidatures_presidentielles", 4.0), ("legislatives", 2.5)), calendar_default=0.8),
+    "Depenses_Communication": IndicatorSpec(
+        base=0.15, rate=((None, 0.10),), divisor=10, origin=2000, sigma=0.15),
+    "Depenses_Juridiques": IndicatorSpec(
+        base=0.08, rate=((None, 0.05),), divisor=4, sigma=0.22,
+        calendar=(("proces", 2.5),), calendar_default=1.2),
+    "Depenses_Fonctionnement": IndicatorSpec(
+        base=0.10, rate=((None, 0.04),), divisor=4, sigma=0.07),
+    "Remboursements_Emprunts": IndicatorSpec(
+        base=0.12, rate=((None, 0.09),), divisor=10, origin=2000, sigma=0.18),
+
+    # Indicateurs financiers
+    "Taux_Execution_Budget": IndicatorSpec(
+        base_key=None, sigma=0.06,
+        level=((1990, 0.78), (2010, 0.82), (None, 0.86))),
+    "Ratio_Cotisations_Revenus": IndicatorSpec(
+        base_key=None, sigma=0.06,
+        level=((1990, 0.25), (2010, 0.22), (None, 0.28))),
+    "Dependance_Financement_Public": IndicatorSpec(
+        base_key=None, sigma=0.08,
+        level=((1990, 0.15), (2010, 0.25), (2020, 0.35), (None, 0.45))),
+    "Solde_Financier": IndicatorSpec(
+        base_key=None, sigma=0.15,
+        calendar=(("candidatures_presidentielles", -0.25),  # Déficits électoraux importants
+                  ("redressement", 0.05)),
+        calendar_default=-0.08),  # Difficultés chroniques
+    "Endettement": IndicatorSpec(
+        base=0.3, kind="cumulative", sigma=0.12,
+        calendar=(("hausse_dette", 0.35), ("baisse_dette", -0.12)), calendar_default=0.08),
+    "Ratio_Depenses_Juridiques": IndicatorSpec(
+        base_key=None, sigma=0.10,
+        level=((1990, 0.06), (2010, 0.09), (None, 0.07))),
+
+    # Investissements stratégiques
+    "Investissement_Communication": IndicatorSpec(
+        base=0.06, rate=((None, 0.11),), divisor=10, origin=2000, sigma=0.16),
+    "Investissement_Numérique": IndicatorSpec(
+        base=0.04, rate=((None, 0.15),), divisor=10, origin=2010, sigma=0.20),
+    "Investissement_Formation": IndicatorSpec(
+        base=0.03, rate=((None, 0.08),), divisor=10, origin=2005, sigma=0.14),
+    "Investissement_International": IndicatorSpec(
+        base=0.02, rate=((None, 0.06),), divisor=10, origin=2010, sigma=0.22),
+}
+
+# Corrélations des bruits : base militante, équilibre budgétaire, dette et financement public
+FN_RN_CORRELATIONS = (
+    ("Adherents", "Cotisations_Adherents", 0.80),
+    ("Adherents", "Dons_Petits", 0.60),
+    ("Cotisations_Adherents", "Dons_Petits", 0.55),
+    ("Revenus_Total", "Depenses_Total", 0.70),
+    ("Depenses_Total", "Depenses_Campagnes", 0.40),
+    ("Depenses_Total", "Depenses_Personnel", 0.30),
+    ("Emprunts", "Endettement", 0.60),
+    ("Emprunts", "Remboursements_Emprunts", 0.40),
+    ("Financement_Public", "Dependance_Financement_Public", 0.70),
+    ("Revenus_Total", "Solde_Financier", 0.30),
+    ("Depenses_Total", "Solde_Financier", -0.20),
+)
+
+# Crises futures possibles (les chocs historiques restent des événements datés)
+FN_RN_SHOCKS = (
+    ShockSpec("affaires_judiciaires", rate=0.15, severity=0.5, start_year=2026,
+              factors=(("Depenses_Juridiques", 1.8), ("Dons_Grands", 0.85))),
+    ShockSpec("refus_bancaires", kind="markov", rate=0.08, exit_rate=0.4, start_year=2026,
+              factors=(("Emprunts", 0.4), ("Aides_Etrangeres", 1.5)),
+              offsets=(("Solde_Financier", -0.04),)),
+    ShockSpec("baisse_financement_public", rate=0.05, severity=0.3, start_year=2026,
+              factors=(("Financement_Public", 0.7), ("Revenus_Total", 0.85), ("Endettement", 1.10)),
+              offsets=(("Solde_Financier", -0.05),)),
+)
+
+FN_RN_PROFILE = PartyProfile(
+    parti="Front National / Rassemblement National",
+    start_year=1972,  # Création du FN
+    end_year=2025,
+    creation_year=1972,
+    renommage_year=2018,  # Devenu Rassemblement National
+    config={
+        "type": "parti_politique",
+        "orientation": "extreme_droite",
+        "electorat_cible": ["ouvriers", "classes_populaires", "ruraux", "patriotes"],
+        "budget_base": 8,  # millions d'euros (plus faible que l'UMP initialement)
+        "adherents_base": 50000,
+        "importance": "croissant",
+        "sources_financement": ["cotisations", "dons_petits", "financement_public", "emprunts", "evenements"],
+        "specificites": ["financement_controle", "difficultes_bancaires", "soutien_petits_dons"]
+    },
+    indicators=FN_RN_INDICATORS,
+    calendar=FN_RN_CALENDAR,
+    events=(
+        (1972, "Revenus_Total", 0.5),  # Création du FN : débuts très modestes
+        (1972, "Adherents", 0.8),
+        (1974, "Depenses_Campagnes", 3.0),  # Première présidentielle
+        (1974, "Dons_Petits", 2.5),
+        (1984, "Financement_Public", 2.0),  # Percée des européennes
+        (1984, "Revenus_Total", 1.4),
+        (1988, "Depenses_Campagnes", 2.8),  # Présidentielle 1988
+        (1988, "Adherents", 1.3),
+        (1990, "Depenses_Juridiques", 2.2),  # Affaire des fiches
+        (2002, "Revenus_Total", 1.8),  # Présidentielle 2002 (second tour)
+        (2002, "Dons_Petits", 3.0),
+        (2002, "Adherents", 1.6),
+        (2011, "Investissement_Communication", 1.5),  # Succession Marine Le Pen
+        (2011, "Adherents", 1.4),
+        (2014, "Emprunts", 4.0),  # Prêts russes
+        (2014, "Aides_Etrangeres", 3.5),
+        (2017, "Depenses_Campagnes", 3.2),  # Présidentielle 2017 (second tour)
+        (2017, "Financement_Public", 1.6),
+        (2018, "Investissement_Communication", 1.8),  # Changement de nom RN
+        (2018, "Depenses_Communication", 1.6),
+        (2020, "Revenus_Evenements", 0.4),  # COVID-19
+        (2020, "Investissement_Numérique", 1.8),
+        (2022, "Financement_Public", 2.5),  # Élections 2022 (89 députés)
+        (2022, "Revenus_Total", 1.6),
+    ),
+    overrides=(
+        (2022, "Elus_Nationaux", 89),  # Réel chiffre 2022
+    ),
+    milestones=(
+        (1972, "Création FN", "Création du Front National"),
+        (1974, "1ère présidentielle", "Première candidature présidentielle de Jean-Marie Le Pen"),
+        (1984, "Percée européenne", "Percée aux élections européennes"),
+        (2002, "Second tour", "Jean-Marie Le Pen au second tour de la présidentielle"),
+        (2011, "Marine Le Pen", "Marine Le Pen prend la tête du parti"),
+        (2014, "Prêts russes", "Controverse des prêts russes"),
+        (2017, "Second tour", "Marine Le Pen au second tour de la présidentielle"),
+        (2018, "RN", "Changement de nom - Rassemblement National"),
+        (2022, "89 députés", "Obtention de 89 députés à l'Assemblée nationale"),
+    ),
+    correlations=FN_RN_CORRELATIONS,
+    shocks=FN_RN_SHOCKS,
+)
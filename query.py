@@ -0,0 +1,164 @@
+"""Index de requêtes sur un EnsembleStore : plages d'années, zones min/max par bloc et prédicats"""
+import operator
+import os
+import numpy as np
+from incremental import EnsembleStore
+
+BLOCK = 4096  # répliques par bloc de zone
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+
+def _runs(flags, length):
+    """Booléen (..., bloc) : au moins ``length`` True consécutifs le long de l'axe 0 (années)"""
+    run = np.zeros(flags.shape[1:], dtype=int)
+    best = np.zeros(flags.shape[1:], dtype=int)
+    for row in flags:
+        run = np.where(row, run + 1, 0)
+        best = np.maximum(best, run)
+    return best >= length
+
+
+class QueryIndex:
+    """Index d'un EnsembleStore : ligne par année, zones min/max (année, bloc de répliques) par colonne
+
+    Les zones sont stockées dans ``zones.npz`` à côté des colonnes et
+    complétées seulement pour les années ajoutées depuis le dernier index
+    (prolongement d'horizon). Les requêtes ne lisent que les lignes
+    d'années demandées et les blocs que les zones ne permettent pas d'exclure.
+    """
+
+    def __init__(self, store, block=BLOCK):
+        self.store = store if isinstance(store, EnsembleStore) else EnsembleStore(store)
+        self.block = block
+        self.n_replicates = self.store.manifest['n_replicates']
+        self.n_blocks = -(-self.n_replicates // block)
+        self.zones = {}  # colonne -> (min, max) de forme (année, bloc)
+        self.last_scan = {}
+        self._load()
+        self.refresh()
+
+    @property
+    def _path(self):
+        return os.path.join(self.store.path, 'zones.npz')
+
+    @property
+    def start_year(self):
+        return self.store.manifest['start_year']
+
+    @property
+    def end_year(self):
+        return self.store.manifest['end_year']
+
+    def _identity(self):
+        """Ce qui distingue un ensemble d'un autre créé au même endroit"""
+        manifest = self.store.manifest
+        return {'_block': str(self.block), '_seed': str(manifest['seed']),
+                '_start_year': str(manifest['start_year']), '_n_replicates': str(self.n_replicates)}
+
+    def _load(self):
+        if not os.path.exists(self._path):
+            return
+        with np.load(self._path) as saved:
+            # Zones d'un autre ensemble (stockage recréé) : tout est recalculé
+            if any(key not in saved or str(saved[key]) != value for key, value in self._identity().items()):
+                return
+            for column in self.store.columns:
+                if f'min_{column}' in saved:
+                    self.zones[column] = (saved[f'min_{column}'], saved[f'max_{column}'])
+
+    def refresh(self):
+        """Calcule les zones des années absentes de l'index (toutes au premier appel)"""
+        n_years = len(self.store.years)
+        changed = False
+        for column in self.store.columns:
+            low, high = self.zones.get(column, (np.empty((0, self.n_blocks)),) * 2)
+            if len(low) >= n_years:
+                continue
+            data = self.store.read(column)[len(low):]
+            pad = self.n_blocks * self.block - self.n_replicates
+            values = np.asarray(data, dtype=float)
+            if pad:
+                values = np.pad(values, ((0, 0), (0, pad)), constant_values=np.nan)
+            values = values.reshape(len(data), self.n_blocks, self.block)
+            self.zones[column] = (np.concatenate([low, np.nanmin(values, axis=2)]),
+                                  np.concatenate([high, np.nanmax(values, axis=2)]))
+            changed = True
+        if changed:
+            arrays = self._identity()
+            for column, (low, high) in self.zones.items():
+                arrays[f'min_{column}'], arrays[f'max_{column}'] = low, high
+            with open(self._path + '.tmp', 'wb') as handle:
+                np.savez(handle, **arrays)
+            os.replace(self._path + '.tmp', self._path)
+        return self
+
+    def year_rows(self, start=None, end=None):
+        """Tranche de lignes (années) correspondant à ``start..end`` inclus"""
+        start = self.start_year if start is None else max(start, self.start_year)
+        end = self.end_year if end is None else min(end, self.end_year)
+        return slice(start - self.start_year, max(start, end + 1) - self.start_year)
+
+    def select(self, column, start=None, end=None, replicates=None):
+        """Valeurs (année, réplique) de ``column`` sur ``start..end`` : seules ces lignes sont lues"""
+        rows = self.year_rows(start, end)
+        data = self.store.read(column)[rows]
+        years = self.store.years[rows]
+        return years, np.array(data if replicates is None else data[:, replicates])
+
+    def zone_filter(self, column, op, threshold, start=None, end=None, consecutive=1):
+        """Blocs à lire et blocs entièrement conformes d'après les seules zones
+
+        Un bloc est candidat s'il peut contenir ``consecutive`` années
+        consécutives vérifiant le prédicat ; il est conforme sans lecture si
+        toutes ses répliques le vérifient sur de telles années.
+        """
+        compare = OPERATORS[op]
+        low, high = self.zones[column]
+        rows = self.year_rows(start, end)
+        low, high = low[rows], high[rows]
+        if op in ('<', '<='):
+            may, all_ = compare(low, threshold), compare(high, threshold)
+        else:
+            may, all_ = compare(high, threshold), compare(low, threshold)
+        candidate = _runs(may, consecutive)
+        certain = _runs(all_, consecutive)
+        return candidate & ~certain, certain
+
+    def replicates_where(self, column, op, threshold, start=None, end=None, consecutive=1):
+        """Répliques ayant au moins ``consecutive`` années consécutives avec ``valeur op seuil``
+
+        Exemple : ``replicates_where('Solde_Financier', '<', 0, consecutive=5)``.
+        Les blocs exclus ou entièrement conformes d'après les zones ne sont pas lus.
+        """
+        to_read, certain = self.zone_filter(column, op, threshold, start, end, consecutive)
+        rows = self.year_rows(start, end)
+        data = self.store.read(column)
+        compare = OPERATORS[op]
+        found = []
+        for b in range(self.n_blocks):
+            block = slice(b * self.block, min((b + 1) * self.block, self.n_replicates))
+            if certain[b]:
+                found.append(np.arange(block.start, block.stop))
+            elif to_read[b]:
+                hits = _runs(compare(np.asarray(data[rows, block]), threshold), consecutive)
+                found.append(block.start + np.flatnonzero(hits))
+        self.last_scan = {'blocs': self.n_blocks, 'lus': int(to_read.sum()), 'conformes': int(certain.sum())}
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def count_where(self, column, op, threshold, start=None, end=None):
+        """Nombre de répliques vérifiant le prédicat, par année (zones utilisées pour éviter les lectures)"""
+        compare = OPERATORS[op]
+        low, high = self.zones[column]
+        rows = self.year_rows(start, end)
+        low, high = low[rows], high[rows]
+        if op in ('<', '<='):
+            may, all_ = compare(low, threshold), compare(high, threshold)
+        else:
+            may, all_ = compare(high, threshold), compare(low, threshold)
+        sizes = np.minimum(self.block, self.n_replicates - np.arange(self.n_blocks) * self.block)
+        counts = (all_ * sizes).sum(axis=1)
+        data = self.store.read(column)
+        for i, b in zip(*np.nonzero(may & ~all_)):
+            block = slice(b * self.block, min((b + 1) * self.block, self.n_replicates))
+            counts[i] += int(compare(np.asarray(data[rows.start + i, block]), threshold).sum())
+        return self.store.years[rows], counts
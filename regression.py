@@ -0,0 +1,292 @@
+"""Non-régression : sorties de référence graines fixées, tolérances par colonne et budgets temps/mémoire par étape"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from batch import simulate_batch
+from calibration import calibrate_indicator
+from Fn import FN_RN_FinanceAnalyzer, scenario_frame
+from health import health_table
+from profiles import FN_RN_PROFILE
+from schema import COLUMN_SCHEMA, read_csv, write_csv
+from service import ANNULE, JobCancelled, JobService, Scenario
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+GOLDEN_SEED = 20240601
+BATCH_REPLICATES = 200
+
+# Tolérances (rtol, atol) : entiers exacts, flottants à la précision float32 près
+DEFAULT_TOLERANCE = (1e-5, 1e-9)
+TOLERANCES = {column: (0.0, 0.0) for column, (dtype, *_) in COLUMN_SCHEMA.items() if dtype.startswith('int')}
+METRIC_TOLERANCE = (1e-6, 1e-9)
+
+# Budgets par étape : (secondes, Mio de pic d'allocation), fixés à partir des
+# médianes mesurées par ``--mesurer`` avec les marges ci-dessous
+TIME_MARGIN = 3.0
+MEMORY_MARGIN = 1.25
+TIMING_REPEAT = 5
+BUDGETS = {
+    'generation': (0.015, 1),
+    'metriques': (0.02, 1),
+    'ensemble': (0.09, 10),
+    'sante': (0.24, 60),
+}
+
+
+def _stage_generation(seed):
+    np.random.seed(seed)
+    return FN_RN_FinanceAnalyzer().generate_financial_data()
+
+
+def _stage_metrics(seed):
+    analyzer = FN_RN_FinanceAnalyzer()
+    np.random.seed(seed)
+    metrics = analyzer.compute_financial_metrics(analyzer.generate_financial_data())
+    return {key: float(value) for key, value in metrics.items()}
+
+
+def _stage_batch(seed):
+    return simulate_batch([FN_RN_PROFILE], BATCH_REPLICATES, seed=seed).quantiles()
+
+
+def _stage_health(seed):
+    table = health_table(simulate_batch([FN_RN_PROFILE], BATCH_REPLICATES, seed=seed))
+    return table.groupby(['Metrique', 'Annee'], observed=True)['Valeur'].median().reset_index()
+
+
+STAGES = {
+    'generation': _stage_generation,
+    'metriques': _stage_metrics,
+    'ensemble': _stage_batch,
+    'sante': _stage_health,
+}
+
+
+def run_stage(name, seed=GOLDEN_SEED, repeat=TIMING_REPEAT):
+    """Exécute une étape ``repeat`` fois chronométrée (médiane), puis sous tracemalloc (pic mémoire)
+
+    Les sorties doivent être identiques : une étape non déterministe à
+    graine fixée est signalée comme une régression.
+    """
+    func = STAGES[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func(seed)
+            timings.append(time.perf_counter() - start)
+        seconds = float(np.median(timings))
+        tracemalloc.start()
+        try:
+            again = func(seed)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return output, again, seconds, peak
+
+
+def compare_frames(expected, actual, tolerances=None):
+    """Écarts entre deux tables colonne par colonne : liste de messages (vide si conforme)"""
+    tolerances = {**TOLERANCES, **(tolerances or {})}
+    problems = []
+    if list(expected.columns) != list(actual.columns):
+        return [f"colonnes différentes: {sorted(set(expected.columns) ^ set(actual.columns)) or 'ordre'}"]
+    if len(expected) != len(actual):
+        return [f"{len(actual)} lignes au lieu de {len(expected)}"]
+    for column in expected.columns:
+        if not pd.api.types.is_numeric_dtype(expected[column]):
+            mismatch = (expected[column].astype(str).to_numpy() != actual[column].astype(str).to_numpy()).sum()
+            if mismatch:
+                problems.append(f"{column}: {mismatch} valeurs différentes")
+            continue
+        rtol, atol = tolerances.get(column, DEFAULT_TOLERANCE)
+        a = expected[column].to_numpy(dtype=float, na_value=np.nan)
+        b = actual[column].to_numpy(dtype=float, na_value=np.nan)
+        bad = ~np.isclose(b, a, rtol=rtol, atol=atol, equal_nan=True)
+        if bad.any():
+            worst = np.nanargmax(np.where(bad, np.abs(b - a), -np.inf))
+            problems.append(f"{column}: {bad.sum()} écarts hors tolérance "
+                            f"(max {abs(b[worst] - a[worst]):.3g} à la ligne {worst}, rtol={rtol}, atol={atol})")
+    return problems
+
+
+def compare_metrics(expected, actual, tolerance=METRIC_TOLERANCE):
+    rtol, atol = tolerance
+    problems = [f"{key}: métrique absente" for key in expected if key not in actual]
+    for key in expected:
+        if key in actual and not np.isclose(actual[key], expected[key], rtol=rtol, atol=atol, equal_nan=True):
+            problems.append(f"{key}: {actual[key]:.6g} au lieu de {expected[key]:.6g}")
+    return problems
+
+
+def _golden_path(golden_dir, name):
+    return os.path.join(golden_dir, f"{name}.json" if name == 'metriques' else f"{name}.csv")
+
+
+def _save(golden_dir, name, output):
+    path = _golden_path(golden_dir, name)
+    if isinstance(output, dict):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(output, handle, ensure_ascii=False, indent=1)
+    elif name == 'generation':
+        write_csv(output, path)
+    else:
+        output.to_csv(path, index=False)
+
+
+def _load(golden_dir, name):
+    path = _golden_path(golden_dir, name)
+    if name == 'metriques':
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    return read_csv(path) if name == 'generation' else pd.read_csv(path)
+
+
+def _same(expected, actual, tolerances):
+    if isinstance(expected, dict):
+        return compare_metrics(expected, actual)
+    if not isinstance(actual, pd.DataFrame):
+        return ["sortie de type inattendu"]
+    # Relecture CSV : comparaison sur des dtypes identiques à ceux de la référence
+    actual = actual.reset_index(drop=True)
+    return compare_frames(expected.reset_index(drop=True), actual.astype(expected.dtypes.to_dict(), errors='ignore'),
+                          tolerances)
+
+
+def check(golden_dir=GOLDEN_DIR, stages=None, tolerances=None, budgets=None, update=False, seed=GOLDEN_SEED):
+    """Compare chaque étape à sa référence et à son budget : {étape: [problèmes]}"""
+    budgets = {**BUDGETS, **(budgets or {})}
+    report = {}
+    if update:
+        os.makedirs(golden_dir, exist_ok=True)
+    for name in stages or STAGES:
+        output, again, seconds, peak = run_stage(name, seed)
+        problems = [f"non déterministe: {problem}" for problem in _same(output, again, tolerances)]
+        if update:
+            _save(golden_dir, name, output)
+        else:
+            problems += _same(_load(golden_dir, name), output, tolerances)
+        max_seconds, max_mib = budgets[name]
+        if seconds > max_seconds:
+            problems.append(f"temps {seconds:.2f}s > budget {max_seconds:.2f}s")
+        if peak > max_mib:
+            problems.append(f"mémoire {peak:.1f} Mio > budget {max_mib:.1f} Mio")
+        report[name] = {'secondes': seconds, 'memoire_mio': peak, 'problemes': problems}
+    return report
+
+
+def check_calibration(seed=GOLDEN_SEED, column='Revenus_Total', tolerance=0.05):
+    """Recouvrement : des taux connus, simulés puis recalibrés depuis ceux du profil, sont retrouvés
+
+    Renvoie la liste des problèmes (vide si les taux calibrés sont à moins de
+    ``tolerance`` des vrais taux et plus proches qu'au départ).
+    """
+    spec = FN_RN_PROFILE.indicators[column]
+    true_rate = tuple((end, rate * (1.5 if i % 2 else 0.6)) for i, (end, rate) in enumerate(spec.rate))
+    truth = FN_RN_PROFILE.with_indicator(column, rate=true_rate, sigma=0.03)
+    result = calibrate_indicator(FN_RN_PROFILE, column, scenario_frame(truth, seed), seed=seed)
+    expected = np.array([rate for _, rate in true_rate])
+    start_error = np.abs(np.array([rate for _, rate in spec.rate]) - expected).max()
+    error = np.abs(np.array([rate for _, rate in result.rate]) - expected).max()
+    problems = []
+    if not error < start_error:
+        problems.append(f"{column}: la calibration ne s'éloigne pas du départ (écart {error:.3f})")
+    elif error > tolerance:
+        problems.append(f"{column}: écart aux vrais taux {error:.3f} > {tolerance}")
+    return problems
+
+
+def measure_budgets(runs=5, seed=GOLDEN_SEED, time_margin=TIME_MARGIN, memory_margin=MEMORY_MARGIN):
+    """Budgets proposés : médiane de ``runs`` mesures par étape, multipliée par les marges"""
+    budgets = {}
+    for name in STAGES:
+        measures = [run_stage(name, seed)[2:] for _ in range(runs)]
+        seconds, peak = np.median(measures, axis=0)
+        budgets[name] = (float(np.ceil(seconds * time_margin * 1000) / 1000),
+                         float(np.ceil(peak * memory_margin)))
+    return budgets
+
+
+async def _service_shutdown(timeout):
+    problems = []
+    service = JobService(max_workers=1, max_pending=4)
+    await service.start()
+    try:
+        running = await service.submit(Scenario(n_replicates=200_000, seed=1, chunk_replicates=20_000))
+        queued = await service.submit(Scenario(n_replicates=10, seed=2))
+        async for event in service.stream(running):
+            if event['type'] == 'demarre':
+                break
+        service.cancel(queued)
+        await asyncio.sleep(0)
+        if not any(event['type'] == ANNULE for event in service.jobs[queued].events):
+            problems.append("annulation en file non publiée immédiatement")
+        try:
+            await service.result(queued)
+            problems.append("result() d'un travail annulé ne lève pas JobCancelled")
+        except JobCancelled:
+            pass
+    finally:
+        try:
+            await asyncio.wait_for(service.close(), timeout)
+        except asyncio.TimeoutError:
+            problems.append(f"close() bloqué plus de {timeout}s pendant un travail en cours")
+    return problems
+
+
+def check_service(timeout=20):
+    """Service : close() rend la main pendant un travail, l'annulation en file est publiée aussitôt"""
+    return asyncio.run(_service_shutdown(timeout))
+
+
+CHECKS = {
+    'calibration': ("recouvrement des taux", check_calibration),
+    'service': ("arrêt et annulation", check_service),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Non-régression des sorties et budgets de performance")
+    parser.add_argument('--update', action='store_true', help="régénère les références")
+    parser.add_argument('--golden', default=GOLDEN_DIR, help="répertoire des références")
+    parser.add_argument('--mesurer', action='store_true', help="mesure les étapes et propose des budgets")
+    parser.add_argument('--stage', action='append', choices=list(STAGES) + list(CHECKS),
+                        help="étape(s) à vérifier")
+    args = parser.parse_args(argv)
+
+    if args.mesurer:
+        for name, (seconds, mib) in measure_budgets().items():
+            print(f"    '{name}': ({seconds}, {mib:.0f}),")
+        return 0
+
+    stages = [name for name in args.stage if name in STAGES] if args.stage else None
+    report = check(args.golden, stages, update=args.update) if stages != [] else {}
+    failed = False
+    for name, result in report.items():
+        status = '❌' if result['problemes'] else '✅'
+        failed |= bool(result['problemes'])
+        print(f"{status} {name}: {result['secondes']:.3f}s, {result['memoire_mio']:.1f} Mio")
+        for problem in result['problemes']:
+            print(f"   • {problem}")
+    for name, (label, func) in CHECKS.items():
+        if args.stage and name not in args.stage:
+            continue
+        problems = func()
+        failed |= bool(problems)
+        print(f"{'❌' if problems else '✅'} {name}: {label}")
+        for problem in problems:
+            print(f"   • {problem}")
+    if args.update:
+        print(f"💾 Références enregistrées dans {args.golden}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Schéma typé des colonnes : dtypes compacts, bornes de validation et écritures CSV/Parquet"""
+import numpy as np
+import pandas as pd
+
+# colonne: (dtype, minimum, maximum)
+COLUMN_SCHEMA = {
+    'Annee': ('int16', 1900, 2200),
+    'Replique': ('int32', 0, None),
+
+    # Adhérents et structure
+    'Adherents': ('int32', 0, 10_000_000),
+    'Federations_Departementales': ('int16', 0, 1_000),
+    'Elus_Locaux': ('int32', 0, 1_000_000),
+    'Elus_Nationaux': ('int16', 0, 1_000),
+    'Score_Presidentielles': ('float32', 0, 100),
+
+    # Revenus (M€)
+    'Revenus_Total': ('float32', 0, None),
+    'Cotisations_Adherents': ('float32', 0, None),
+    'Dons_Petits': ('float32', 0, None),
+    'Dons_Grands': ('float32', 0, None),
+    'Financement_Public': ('float32', 0, None),
+    'Revenus_Evenements': ('float32', 0, None),
+    'Emprunts': ('float32', 0, None),
+    'Aides_Etrangeres': ('float32', 0, None),
+
+    # Dépenses (M€)
+    'Depenses_Total': ('float32', 0, None),
+    'Depenses_Personnel': ('float32', 0, None),
+    'Depenses_Campagnes': ('float32', 0, None),
+    'Depenses_Communication': ('float32', 0, None),
+    'Depenses_Juridiques': ('float32', 0, None),
+    'Depenses_Fonctionnement': ('float32', 0, None),
+    'Remboursements_Emprunts': ('float32', 0, None),
+
+    # Indicateurs financiers (ratios)
+    'Taux_Execution_Budget': ('float32', 0, 2),
+    'Ratio_Cotisations_Revenus': ('float32', 0, 1),
+    'Dependance_Financement_Public': ('float32', 0, 1),
+    'Solde_Financier': ('float32', -1, 1),
+    'Endettement': ('float32', 0, None),
+    'Ratio_Depenses_Juridiques': ('float32', 0, 1),
+
+    # Investissements stratégiques (M€)
+    'Investissement_Communication': ('float32', 0, None),
+    'Investissement_Numérique': ('float32', 0, None),
+    'Investissement_Formation': ('float32', 0, None),
+    'Investissement_International': ('float32', 0, None),
+}
+
+
+def validate_schema(df):
+    """Retourne les violations de bornes {colonne: nombre de valeurs hors bornes}"""
+    violations = {}
+    for column, (_, lower, upper) in COLUMN_SCHEMA.items():
+        if column not in df:
+            continue
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        bad = np.zeros(len(values), dtype=bool)
+        if lower is not None:
+            bad |= values < lower
+        if upper is not None:
+            bad |= values > upper
+        if bad.any():
+            violations[column] = int(bad.sum())
+    return violations
+
+
+def apply_schema(df, strict=False):
+    """Convertit les colonnes connues vers leurs dtypes compacts
+
+    Les colonnes entières sont arrondies (dtype nullable ``Int16``/``Int32`` en
+    cas de valeurs manquantes) ; une valeur hors de la capacité du dtype lève
+    ValueError. Avec ``strict=True``, toute violation des bornes du schéma
+    lève également ValueError.
+    """
+    if strict:
+        violations = validate_schema(df)
+        if violations:
+            raise ValueError(f"Valeurs hors bornes: {violations}")
+
+    converted = {}
+    for column in df.columns:
+        if column not in COLUMN_SCHEMA:
+            converted[column] = df[column]
+            continue
+        dtype = np.dtype(COLUMN_SCHEMA[column][0])
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        if dtype.kind == 'i':
+            values = np.rint(values)
+            info = np.iinfo(dtype)
+            if np.nanmin(values, initial=0) < info.min or np.nanmax(values, initial=0) > info.max:
+                raise ValueError(f"Colonne {column} incompatible avec {dtype}")
+            if np.isnan(values).any():
+                converted[column] = pd.array(values, dtype=dtype.name.capitalize())
+                continue
+        converted[column] = values.astype(dtype)
+    return pd.DataFrame(converted, index=df.index)
+
+
+def write_csv(df, path):
+    """Écrit un CSV conforme au schéma"""
+    apply_schema(df).to_csv(path, index=False)
+
+
+def read_csv(path, **kwargs):
+    """Relit un CSV avec les dtypes du schéma"""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {column: COLUMN_SCHEMA[column][0] for column in header if column in COLUMN_SCHEMA}
+    return pd.read_csv(path, dtype=dtypes, **kwargs)
+
+
+def write_parquet(df, path):
+    """Écrit un Parquet conforme au schéma (nécessite pyarrow ou fastparquet)"""
+    apply_schema(df).to_parquet(path, index=False)
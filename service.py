@@ -0,0 +1,297 @@
+"""Service local de simulation asyncio : soumission de scénarios, suivi en flux, annulation"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import io
+import itertools
+import numpy as np
+from batch import concat_replicates, simulate_batch
+from profiles import FN_RN_PROFILE
+
+# États d'un travail
+EN_ATTENTE, EN_COURS, TERMINE, ANNULE, ERREUR = 'en_attente', 'en_cours', 'termine', 'annule', 'erreur'
+TERMINAL_STATES = (TERMINE, ANNULE, ERREUR)
+
+
+class JobCancelled(Exception):
+    """Le travail attendu a été annulé (distinct de l'annulation de la tâche appelante)"""
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Paramètres d'une simulation soumise au service"""
+    profile: object = FN_RN_PROFILE
+    n_replicates: int = 1
+    seed: int = None
+    chunk_replicates: int = 1000  # répliques simulées par tâche (résultat partiel)
+    render: bool = False  # rendu PNG des 8 panneaux (première réplique)
+
+    def cache_key(self):
+        """Clé du cache de jeux de données (None si le scénario n'est pas reproductible)"""
+        if self.seed is None:
+            return None
+        raw = repr((self.profile, self.n_replicates, self.seed, self.chunk_replicates))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _warm_worker():
+    """Initialisation des processus : imports lourds et backend sans affichage faits une fois"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import Fn  # noqa: F401 (préchargement de pandas, matplotlib et seaborn)
+
+
+def _simulate_chunk(profile, n_replicates, seed):
+    return simulate_batch([profile], n_replicates, seed=seed)
+
+
+def _render_png(profile, df):
+    from Fn import FN_RN_FinanceAnalyzer
+
+    fig = FN_RN_FinanceAnalyzer(profile)._build_figure(df)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class Job:
+    """Travail soumis : état, événements diffusés aux abonnés et résultat final"""
+
+    def __init__(self, job_id, scenario):
+        self.id = job_id
+        self.scenario = scenario
+        self.status = EN_ATTENTE
+        self.events = []
+        self.result = None
+        self.image = None
+        self.error = None
+        self._changed = asyncio.Condition()
+        self._current = None  # future de la tâche en cours dans le pool
+        self._cancel_requested = False
+        self._wakeup = None
+
+    async def _emit(self, kind, **payload):
+        async with self._changed:
+            self.events.append({'type': kind, 'job': self.id, **payload})
+            self._changed.notify_all()
+
+    def _emit_nowait(self, kind, **payload):
+        """Publie un événement depuis du code synchrone ; les abonnés sont réveillés au prochain tour"""
+        self.events.append({'type': kind, 'job': self.id, **payload})
+        self._wakeup = asyncio.get_running_loop().create_task(self._wake())
+
+    async def _wake(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+
+class JobService:
+    """Service asyncio adossé à un pool de processus borné et chaud
+
+    ``submit`` attend lorsque ``max_pending`` travaux sont déjà en file
+    (contre-pression) ; au plus ``max_workers`` travaux s'exécutent en même
+    temps. Les résultats des scénarios reproductibles (graine fixée) sont
+    conservés dans un cache LRU partagé par toutes les requêtes. Un travail
+    terminé reste consultable ``retention`` secondes, puis il est oublié.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, cache_size=32, retention=600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.retention = retention
+        self.jobs = {}
+        self._cache = OrderedDict()
+        self._inflight = {}  # clé de cache -> travail en cours produisant ce jeu de données
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._pool = None
+        self._runners = []
+        self._closing = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        self._runners = [asyncio.create_task(self._runner()) for _ in range(self.max_workers)]
+
+    async def close(self):
+        """Arrête les exécuteurs ; les travaux inachevés sont signalés annulés à leurs abonnés"""
+        self._closing = True
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        for job in self.jobs.values():
+            if job.status not in TERMINAL_STATES:
+                job.status = ANNULE
+                await job._emit(ANNULE, status=ANNULE)
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def submit(self, scenario):
+        """Soumet un scénario et renvoie l'identifiant du travail (attend si la file est pleine)"""
+        job = Job(f"job-{next(self._ids)}", scenario)
+        self.jobs[job.id] = job
+        await self._queue.put(job)
+        await job._emit('soumis', status=EN_ATTENTE)
+        return job.id
+
+    def cancel(self, job_id):
+        """Annule un travail en attente ou interrompt un travail en cours entre deux tâches"""
+        job = self.jobs[job_id]
+        if job.status in TERMINAL_STATES:
+            return False
+        job._cancel_requested = True
+        if job.status == EN_ATTENTE:
+            # Pas encore pris par un exécuteur : annulé et publié tout de suite
+            job.status = ANNULE
+            job._emit_nowait(ANNULE, status=ANNULE)
+        elif job._current is not None:
+            job._current.cancel()
+        return True
+
+    async def stream(self, job_id):
+        """Itère sur les événements d'un travail (progression, résultats partiels) jusqu'à sa fin"""
+        job = self.jobs[job_id]
+        position = 0
+        while True:
+            async with job._changed:
+                await job._changed.wait_for(lambda: len(job.events) > position)
+                events = job.events[position:]
+            position += len(events)
+            for event in events:
+                yield event
+                if event['type'] in TERMINAL_STATES:
+                    return
+
+    async def result(self, job_id):
+        """Attend la fin d'un travail et renvoie son BatchResult (JobCancelled s'il a été annulé)"""
+        async for _ in self.stream(job_id):
+            pass
+        job = self.jobs[job_id]
+        if job.status == ERREUR:
+            raise RuntimeError(f"{job_id}: {job.error}")
+        if job.status == ANNULE:
+            raise JobCancelled(job_id)
+        return job.result
+
+    async def _runner(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job._cancel_requested:
+                    continue  # annulé en file : l'événement est déjà publié
+                await self._run(job)
+            finally:
+                self._retire(job)
+                self._queue.task_done()
+
+    def _retire(self, job):
+        """Allège un travail terminé et programme son oubli après ``retention`` secondes"""
+        if job.status not in TERMINAL_STATES:
+            return
+        # Le résultat final contient déjà les répliques des résultats partiels
+        job.events = [{key: value for key, value in event.items() if key != 'donnees'}
+                      for event in job.events]
+        asyncio.get_running_loop().call_later(self.retention, self.jobs.pop, job.id, None)
+
+    async def _offload(self, job, func, *args):
+        loop = asyncio.get_running_loop()
+        job._current = loop.run_in_executor(self._pool, func, *args)
+        try:
+            return await job._current
+        finally:
+            job._current = None
+
+    async def _run(self, job):
+        scenario = job.scenario
+        key = scenario.cache_key()
+        job.status = EN_COURS
+        await job._emit('demarre', status=EN_COURS)
+        try:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                job.result = self._cache[key]
+                await job._emit('progression', fait=scenario.n_replicates,
+                                total=scenario.n_replicates, cache=True)
+            else:
+                job.result = await self._shared(job, key)
+
+            if scenario.render:
+                if job._cancel_requested:
+                    raise asyncio.CancelledError(job.id)
+                df = job.result.party_frame(0, replicate=0)
+                job.image = await self._offload(job, _render_png, scenario.profile, df)
+                await job._emit('image', taille=len(job.image))
+
+            job.status = TERMINE
+            await job._emit(TERMINE, status=TERMINE)
+        except asyncio.CancelledError:
+            # Seule l'annulation du travail est traitée ici ; celle de l'exécuteur (close) remonte
+            if self._closing or not job._cancel_requested:
+                raise
+            job.status = ANNULE
+            await job._emit(ANNULE, status=ANNULE)
+        except Exception as exc:  # l'erreur est transmise aux abonnés du travail
+            job.status = ERREUR
+            job.error = repr(exc)
+            await job._emit(ERREUR, status=ERREUR, message=job.error)
+
+    async def _shared(self, job, key):
+        """Attend le travail qui calcule déjà ce jeu de données, sinon le simule
+
+        Si ce travail est annulé ou échoue, un travail en attente reprend la
+        simulation à son compte au lieu d'hériter de l'annulation.
+        """
+        scenario = job.scenario
+        while key is not None and key in self._inflight:
+            owner = self._inflight[key]
+            job._current = asyncio.ensure_future(self._finished(owner.id))
+            try:
+                await job._current
+            finally:
+                job._current = None
+            if owner.result is not None:  # simulation aboutie (même si le rendu a échoué)
+                await job._emit('progression', fait=scenario.n_replicates,
+                                total=scenario.n_replicates, cache=True)
+                return owner.result
+
+        if key is not None:
+            self._inflight[key] = job
+        try:
+            result = await self._simulate(job)
+        finally:
+            if self._inflight.get(key) is job:
+                del self._inflight[key]
+        if key is not None:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def _finished(self, job_id):
+        async for _ in self.stream(job_id):
+            pass
+
+    async def _simulate(self, job):
+        scenario = job.scenario
+        sizes = [min(scenario.chunk_replicates, scenario.n_replicates - start)
+                 for start in range(0, scenario.n_replicates, scenario.chunk_replicates)]
+        seeds = np.random.SeedSequence(scenario.seed).spawn(len(sizes))
+        chunks, done = [], 0
+        for size, seed in zip(sizes, seeds):
+            if job._cancel_requested:
+                raise asyncio.CancelledError(job.id)
+            chunk = await self._offload(job, _simulate_chunk, scenario.profile, size, seed)
+            chunks.append(chunk)
+            done += size
+            await job._emit('partiel', debut=done - size, fin=done, donnees=chunk)
+            await job._emit('progression', fait=done, total=scenario.n_replicates)
+        return concat_replicates(chunks)
@@ -0,0 +1,352 @@
+"""Serveur local de jeux de données en mémoire partagée : vues NumPy/pandas sans copie, par nom
+
+Un processus serveur simule chaque ensemble une seule fois et le garde dans
+un segment ``multiprocessing.shared_memory`` ; les clients (notebooks,
+rapports) s'y attachent en lecture seule. Chaque ouverture est un bail que
+le client renouvelle périodiquement : les segments sous bail sont protégés,
+les autres (y compris ceux d'un client disparu, dont les baux expirent) sont
+évincés du moins récemment utilisé au plus récent lorsque la capacité est
+dépassée.
+
+Le gestionnaire échange des pickles : la clé d'authentification est propre
+à chaque serveur (``os.urandom``) et transmise aux clients par la variable
+d'environnement ``FN_RN_DATASETS_KEY`` (hexadécimal) ou explicitement.
+"""
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from multiprocessing.managers import BaseManager
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from batch import BatchResult, simulate_batch
+
+ADDRESS = ('127.0.0.1', 50071)
+AUTHKEY_ENV = 'FN_RN_DATASETS_KEY'
+CAPACITY = 2 * 2 ** 30  # octets conservés au plus (hors jeux de données en cours d'utilisation)
+LEASE_SECONDS = 30.0  # durée d'un bail sans renouvellement
+ALIGN = 64
+
+
+def new_authkey():
+    """Clé aléatoire pour un serveur"""
+    return os.urandom(32)
+
+
+def _authkey(authkey):
+    """Clé explicite ou lue dans FN_RN_DATASETS_KEY ; refusée si absente"""
+    if authkey is None and os.environ.get(AUTHKEY_ENV):
+        authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+    if not authkey:
+        raise RuntimeError(f"Clé d'authentification absente (argument authkey ou variable {AUTHKEY_ENV})")
+    return authkey
+
+
+def _attach(name):
+    """Attache un segment existant sans le confier au resource_tracker du client"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+    shm = shared_memory.SharedMemory(name=name)
+    # Sinon le tracker du client supprimerait le segment du serveur à sa sortie
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _build_segment(recipe):
+    """Simule la recette et copie tous les tableaux dans un seul segment : (segment, disposition)"""
+    result = simulate_batch(recipe['profiles'], recipe.get('n_replicates', 1), seed=recipe.get('seed'))
+    arrays = {'_annees': result.years, '_masque': result.mask, **result.data}
+    fields, offset = [], 0
+    for key, array in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        fields.append((key, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (key, dtype, shape, start), array in zip(fields, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    layout = {'segment': shm.name, 'parties': result.parties, 'fields': fields, 'nbytes': offset}
+    return shm, layout
+
+
+class _Entry:
+    def __init__(self, shm, layout, recipe):
+        self.shm = shm
+        self.layout = layout
+        self.recipe = recipe
+        self.refs = 0  # baux en cours
+
+
+class DatasetRegistry:
+    """Registre du serveur : segments par nom, baux des clients et éviction LRU"""
+
+    def __init__(self, capacity=CAPACITY, lease_seconds=LEASE_SECONDS):
+        self.capacity = capacity
+        self.lease_seconds = lease_seconds
+        self._entries = OrderedDict()
+        self._leases = {}  # bail -> [nom, échéance]
+        self._building = {}  # nom -> threading.Event pendant la simulation
+        self._lock = threading.Lock()
+
+    def acquire(self, name, recipe=None):
+        """(bail, disposition) du segment ``name`` (simulé à la première demande)"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    if recipe is not None and repr(recipe) != repr(entry.recipe):
+                        raise ValueError(f"Le jeu de données {name} existe avec une autre recette")
+                    self._entries.move_to_end(name)
+                    return self._lease(name), entry.layout
+                if recipe is None:
+                    raise KeyError(f"Jeu de données inconnu: {name}")
+                building = self._building.get(name)
+                if building is None:
+                    building = self._building[name] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                # Un autre client simule déjà ce jeu de données : on attend puis on réessaie
+                building.wait()
+                continue
+            try:
+                shm, layout = _build_segment(recipe)
+                with self._lock:
+                    self._entries[name] = _Entry(shm, layout, recipe)
+                    lease = self._lease(name)  # sous bail avant toute éviction
+                    self._evict()
+                return lease, layout
+            finally:
+                with self._lock:
+                    self._building.pop(name).set()
+
+    def _lease(self, name):
+        lease = uuid.uuid4().hex
+        self._leases[lease] = [name, time.monotonic() + self.lease_seconds]
+        self._entries[name].refs += 1
+        return lease
+
+    def renew(self, leases):
+        """Prolonge des baux ; renvoie ceux qui avaient déjà expiré"""
+        with self._lock:
+            deadline = time.monotonic() + self.lease_seconds
+            lost = []
+            for lease in leases:
+                if lease in self._leases:
+                    self._leases[lease][1] = deadline
+                else:
+                    lost.append(lease)
+            return lost
+
+    def release(self, lease):
+        """Rend un bail ; le segment devient évinçable lorsqu'il n'en a plus"""
+        with self._lock:
+            self._drop(lease)
+            self._evict()
+
+    def expire(self):
+        """Rend les baux non renouvelés à temps (clients arrêtés ou disparus)"""
+        with self._lock:
+            now = time.monotonic()
+            for lease in [lease for lease, (_, deadline) in self._leases.items() if deadline < now]:
+                self._drop(lease)
+            self._evict()
+
+    def evict(self, name):
+        """Supprime un jeu de données non utilisé"""
+        with self._lock:
+            entry = self._entries[name]
+            if entry.refs:
+                raise RuntimeError(f"{name} est utilisé par {entry.refs} client(s)")
+            self._unlink(name)
+
+    def stats(self):
+        with self._lock:
+            return {name: {'references': entry.refs, 'octets': entry.layout['nbytes']}
+                    for name, entry in self._entries.items()}
+
+    def close(self):
+        with self._lock:
+            for name in list(self._entries):
+                self._unlink(name)
+            self._leases.clear()
+
+    def _drop(self, lease):
+        held = self._leases.pop(lease, None)
+        if held is not None and held[0] in self._entries:
+            entry = self._entries[held[0]]
+            entry.refs = max(0, entry.refs - 1)
+
+    def _evict(self):
+        total = sum(entry.layout['nbytes'] for entry in self._entries.values())
+        for name in [name for name, entry in self._entries.items() if entry.refs == 0]:
+            if total <= self.capacity:
+                break
+            total -= self._entries[name].layout['nbytes']
+            self._unlink(name)
+
+    def _unlink(self, name):
+        entry = self._entries.pop(name)
+        entry.shm.close()
+        entry.shm.unlink()
+
+
+class _DatasetManager(BaseManager):
+    pass
+
+
+def serve(address=ADDRESS, authkey=None, capacity=CAPACITY, lease_seconds=LEASE_SECONDS):
+    """Lance le serveur au premier plan (bloquant) ; les segments sont supprimés à l'arrêt
+
+    ``authkey`` (ou FN_RN_DATASETS_KEY) est obligatoire.
+    """
+    authkey = _authkey(authkey)
+    registry = DatasetRegistry(capacity, lease_seconds)
+    _DatasetManager.register('registry', callable=lambda: registry)
+    server = _DatasetManager(address=address, authkey=authkey).get_server()
+
+    def reap():
+        while True:
+            time.sleep(lease_seconds / 3)
+            registry.expire()
+
+    threading.Thread(target=reap, daemon=True).start()
+    print(f"🗄️ Serveur de jeux de données sur {address[0]}:{address[1]}")
+    # SIGTERM termine proprement : les segments sont supprimés dans le finally
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        registry.close()
+
+
+def start_server(address=ADDRESS, authkey=None, capacity=CAPACITY, lease_seconds=LEASE_SECONDS):
+    """Démarre le serveur dans un processus d'arrière-plan : (processus, clé)
+
+    Sans ``authkey``, une clé neuve est générée et exportée dans
+    FN_RN_DATASETS_KEY pour les clients de ce processus et de ses enfants.
+    """
+    import multiprocessing
+    if authkey is None:
+        authkey = new_authkey()
+        os.environ[AUTHKEY_ENV] = authkey.hex()
+    process = multiprocessing.Process(target=serve, args=(address, authkey, capacity, lease_seconds),
+                                      daemon=True)
+    process.start()
+    return process, authkey
+
+
+class SharedDataset:
+    """Vue en lecture seule d'un ensemble partagé : tableaux (parti, réplique, année) sans copie"""
+
+    def __init__(self, client, name, lease, layout):
+        self._client = client
+        self.name = name
+        self.lease = lease
+        self._shm = _attach(layout['segment'])
+        self.arrays = {}
+        for key, dtype, shape, offset in layout['fields']:
+            array = np.ndarray(tuple(shape), dtype=dtype, buffer=self._shm.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[key] = array
+        years, mask = self.arrays.pop('_annees'), self.arrays.pop('_masque')
+        self.result = BatchResult(list(layout['parties']), years, mask, self.arrays)
+
+    def frame(self, party=0, replicate=0):
+        """DataFrame (Annee + colonnes) d'un parti et d'une réplique, adossé au segment partagé"""
+        p = party if isinstance(party, int) else self.result.parties.index(party)
+        sel = self.result.mask[p]
+        if sel.all():
+            columns = {'Annee': self.result.years}
+            columns.update({column: values[p, replicate] for column, values in self.arrays.items()})
+        else:
+            columns = {'Annee': self.result.years[sel]}
+            columns.update({column: values[p, replicate, sel] for column, values in self.arrays.items()})
+        return pd.DataFrame(columns, copy=False)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.arrays = {}
+        self.result = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # des vues sont encore utilisées : le mappage sera libéré avec elles
+        self._shm = None
+        self._client._release(self.lease)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DatasetClient:
+    """Connexion au serveur : ``open(nom, profiles=..., n_replicates=..., seed=...)``
+
+    Un fil d'arrière-plan renouvelle les baux des jeux de données ouverts ;
+    si le client disparaît, le serveur les rend à leur échéance.
+    """
+
+    def __init__(self, address=ADDRESS, authkey=None, lease_seconds=LEASE_SECONDS):
+        _DatasetManager.register('registry')
+        self._manager = _DatasetManager(address=address, authkey=_authkey(authkey))
+        self._manager.connect()
+        self._registry = self._manager.registry()
+        self._leases = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew, args=(lease_seconds / 3,), daemon=True)
+        self._heartbeat.start()
+
+    def open(self, name, profiles=None, n_replicates=1, seed=None):
+        """Attache le jeu de données ``name`` ; le serveur le simule s'il n'existe pas encore
+
+        Sans ``profiles``, le jeu de données doit déjà exister. ``seed`` fixe
+        la recette : deux clients demandant le même nom partagent le même segment.
+        """
+        recipe = None
+        if profiles is not None:
+            recipe = {'profiles': list(profiles), 'n_replicates': n_replicates, 'seed': seed}
+        lease, layout = self._registry.acquire(name, recipe)
+        with self._lock:
+            self._leases.add(lease)
+        return SharedDataset(self, name, lease, layout)
+
+    def stats(self):
+        return self._registry.stats()
+
+    def evict(self, name):
+        self._registry.evict(name)
+
+    def close(self):
+        """Arrête le renouvellement ; les baux encore ouverts expireront côté serveur"""
+        self._stop.set()
+
+    def _release(self, lease):
+        with self._lock:
+            self._leases.discard(lease)
+        self._registry.release(lease)
+
+    def _renew(self, interval):
+        while not self._stop.wait(interval):
+            with self._lock:
+                leases = list(self._leases)
+            if leases:
+                lost = self._registry.renew(leases)
+                if lost:
+                    print(f"⚠️ {len(lost)} bail(s) expiré(s) : segments susceptibles d'être évincés")
+
+
+if __name__ == "__main__":
+    if not os.environ.get(AUTHKEY_ENV):
+        os.environ[AUTHKEY_ENV] = new_authkey().hex()
+        print(f"🔑 export {AUTHKEY_ENV}={os.environ[AUTHKEY_ENV]}")
+    serve()
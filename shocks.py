@@ -0,0 +1,99 @@
+"""Chocs aléatoires (affaires judiciaires, refus bancaires, baisses de financement) tirés pour toutes les répliques"""
+from dataclasses import dataclass
+import numpy as np
+from kernels import compound, markov_states
+
+
+@dataclass(frozen=True)
+class ShockSpec:
+    """Processus de chocs appliqué à un ensemble de colonnes
+
+    ``kind='poisson'`` : Poisson composé, ``rate`` événements par an et par
+    réplique, chacun d'ampleur log-normale (moyenne 1, dispersion ``severity``).
+    ``kind='markov'`` : régime de crise à deux états, entrée avec la
+    probabilité ``rate`` et sortie avec ``exit_rate`` chaque année ; chaque
+    année de crise a sa propre ampleur log-normale (même loi), ou 1 si
+    ``severity`` est nul. L'intensité d'une cellule (somme des ampleurs en
+    Poisson, ampleur de l'année en crise) multiplie les colonnes par
+    ``facteur ** intensite`` et décale par ``delta * intensite``.
+    """
+    name: str
+    kind: str = "poisson"
+    rate: float = 0.1
+    exit_rate: float = 0.5  # kind='markov' uniquement
+    severity: float = 0.0
+    factors: tuple = ()  # ((colonne, facteur), ...)
+    offsets: tuple = ()  # ((colonne, delta), ...)
+    start_year: int = None  # première année exposée (None = tout l'horizon)
+
+
+def _magnitudes(spec, rng, size):
+    if not spec.severity:
+        return np.ones(size)
+    return rng.lognormal(-spec.severity ** 2 / 2, spec.severity, size)
+
+
+def sample_shock(spec, rng, n_replicates, years):
+    """Cellules touchées (indices à plat dans (réplique, année)) et intensité du choc
+
+    Seules les cellules touchées sont matérialisées pour le Poisson composé :
+    le nombre total d'événements est tiré d'un coup puis réparti uniformément
+    sur les cellules exposées.
+    """
+    years = np.asarray(years)
+    exposed = np.flatnonzero(years >= (spec.start_year if spec.start_year is not None else years[0]))
+    n_years = len(years)
+    if len(exposed) == 0 or spec.rate <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    if spec.kind == 'poisson':
+        n_events = rng.poisson(spec.rate * n_replicates * len(exposed))
+        replicate = rng.integers(0, n_replicates, n_events)
+        year = exposed[rng.integers(0, len(exposed), n_events)]
+        cells, inverse = np.unique(replicate * n_years + year, return_inverse=True)
+        intensity = np.bincount(inverse, weights=_magnitudes(spec, rng, n_events), minlength=len(cells))
+        return cells, intensity
+
+    if spec.kind == 'markov':
+        # Tirages année-majeur (année, réplique), chaîne déroulée par kernels
+        states = markov_states(rng.random((len(exposed), n_replicates)), spec.rate, spec.exit_rate)
+        year_pos, replicate = np.nonzero(states)
+        cells = np.sort(replicate * n_years + exposed[year_pos])
+        return cells, _magnitudes(spec, rng, len(cells))
+
+    raise ValueError(f"Type de choc inconnu: {spec.kind}")
+
+
+def apply_shocks(profile, values, years, rng):
+    """Applique les chocs du profil à ``values`` ({colonne: tableau (réplique, année)}), en place
+
+    Les colonnes cumulatives (stocks comme l'endettement) gardent la trace du
+    choc les années suivantes ; les autres ne sont modifiées qu'aux cellules touchées.
+    """
+    for spec in profile.shocks:
+        n_replicates, n_years = next(iter(values.values())).shape
+        cells, intensity = sample_shock(spec, rng, n_replicates, years)
+        if len(cells) == 0:
+            continue
+        replicate, year = np.divmod(cells, n_years)
+        for column, factor in spec.factors:
+            if column not in values:
+                continue
+            target = values[column]
+            if profile.indicators[column].kind == 'cumulative':
+                multiplier = np.ones(n_replicates * n_years)
+                multiplier[cells] = factor ** intensity
+                target *= compound(multiplier.reshape(n_replicates, n_years))
+            else:
+                target[replicate, year] *= factor ** intensity
+        for column, delta in spec.offsets:
+            if column not in values:
+                continue
+            target = values[column]
+            if profile.indicators[column].kind == 'cumulative':
+                shift = np.zeros(n_replicates * n_years)
+                shift[cells] = delta * intensity
+                target += np.cumsum(shift.reshape(n_replicates, n_years), axis=1)
+            else:
+                target[replicate, year] += delta * intensity
+    return values